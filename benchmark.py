@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks on recorded clips.
+
+Replays local video files through GestureEngine and GestureBuffer using clip
+time (frame index / fps) instead of wall-clock time, so results are
+repeatable and independent of how fast the benchmark machine is.
+
+Usage:
+    python3 benchmark.py filter --video clip1.mp4 --video clip2.mp4
+    python3 benchmark.py fusion --video clip1.mp4
+    python3 benchmark.py tiles --video fisheye_4k.mp4 --grid 3x2 --expect OPEN_PALM
+    python3 benchmark.py templates --templates 500
+    python3 benchmark.py remote --video clip1.mp4 --workers 2 --kill-after 200
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# CRITICAL: Suppress FFmpeg logs BEFORE importing cv2
+import suppress_ffmpeg_logs
+
+import numpy as np
+import logging
+
+import config
+import main as app
+from src.clip_reader import read_clip
+from src.gesture_engine import GestureEngine
+from src.landmark_filter import LandmarkSmoother
+from src.remote_inference import RemoteGestureEngine
+from src.template_classifier import EMBEDDING_DIM, TemplateClassifier, TemplateIndex, normalize_landmarks
+from src.tiled_engine import TiledGestureEngine
+
+logger = logging.getLogger('benchmark')
+
+# (clip_time, gesture, confidence, scores) for every processed frame
+Detections = List[Tuple[float, Optional[str], float, Optional[Dict[str, float]]]]
+
+
+# ============================================================================
+# Clip replay helpers
+# ============================================================================
+
+def run_engine(engine, path: str, max_frames: int = 0, resize: bool = True) -> Tuple[Detections, List[float]]:
+    """Run the engine over a clip; return detections and per-frame latencies."""
+    detections, latencies = [], []
+    for clip_time, frame in read_clip(path, max_frames, resize):
+        started = time.perf_counter()
+        gesture, confidence = engine.process_frame(frame, timestamp=clip_time)
+        latencies.append(time.perf_counter() - started)
+        detections.append((clip_time, gesture, confidence, engine.last_scores))
+    return detections, latencies
+
+
+def time_to_trigger(detections: Detections, fusion: bool = False) -> Dict:
+    """
+    Feed detections through a fresh GestureBuffer (or ScoreFusionBuffer) the
+    way main() does and measure clip time from the first detected hand to
+    the first trigger.
+    """
+    if fusion:
+        buffer = app.ScoreFusionBuffer(config.FUSION_HALF_LIFE, config.FUSION_TRIGGER_THRESHOLD)
+    else:
+        buffer = app.GestureBuffer()
+    first_hand = None
+    trigger_time = None
+    triggered = None
+    switches = 0
+    previous = None
+
+    for clip_time, gesture, confidence, scores in detections:
+        if gesture and gesture != 'NONE':
+            if first_hand is None:
+                first_hand = clip_time
+            if previous is not None and gesture != previous:
+                switches += 1
+            previous = gesture
+        else:
+            previous = None
+
+        if fusion:
+            result = buffer.add_detection(gesture, confidence, scores, timestamp=clip_time)
+        elif gesture and gesture != 'NONE':
+            result = buffer.add_detection(gesture, confidence)
+        else:
+            result = buffer.add_detection(None, 0.0)
+
+        if result and trigger_time is None:
+            trigger_time = clip_time
+            triggered = result
+
+    return {
+        'time_to_trigger': (trigger_time - first_hand) if trigger_time is not None else None,
+        'gesture': triggered,
+        'switches': switches,
+    }
+
+
+def _median(values: List[float]) -> Optional[float]:
+    return statistics.median(values) if values else None
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000.0, 1) if seconds is not None else None
+
+
+def _us(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1e6, 1) if seconds is not None else None
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def bench_filter(args) -> Dict:
+    """Median time-to-trigger and gesture flicker with and without One Euro smoothing."""
+    engine = GestureEngine()
+    report = {'clips': [], 'summary': {}}
+    variants = {
+        'raw': None,
+        'one_euro': lambda: LandmarkSmoother(args.min_cutoff, args.beta),
+    }
+
+    try:
+        per_variant = {name: {'ttt': [], 'switches': 0, 'misses': 0} for name in variants}
+        for path in args.video:
+            clip = {'video': path}
+            for name, make_filter in variants.items():
+                engine.landmark_filter = make_filter() if make_filter else None
+                detections, _ = run_engine(engine, path, args.max_frames)
+                result = time_to_trigger(detections)
+                clip[name] = result
+                stats = per_variant[name]
+                stats['switches'] += result['switches']
+                if result['time_to_trigger'] is None:
+                    stats['misses'] += 1
+                else:
+                    stats['ttt'].append(result['time_to_trigger'])
+            report['clips'].append(clip)
+            logger.info(f"{path}: raw={clip['raw']} one_euro={clip['one_euro']}")
+    finally:
+        engine.release()
+
+    for name, stats in per_variant.items():
+        report['summary'][name] = {
+            'median_time_to_trigger_ms': _ms(_median(stats['ttt'])),
+            'gesture_switches': stats['switches'],
+            'clips_without_trigger': stats['misses'],
+        }
+
+    raw = report['summary']['raw']['median_time_to_trigger_ms']
+    smoothed = report['summary']['one_euro']['median_time_to_trigger_ms']
+    if raw and smoothed is not None:
+        report['summary']['median_reduction_pct'] = round((raw - smoothed) / raw * 100.0, 1)
+    return report
+
+
+def bench_fusion(args) -> Dict:
+    """Top-1 debouncing vs temporal score fusion on the same recognizer output."""
+    config.GESTURE_TRIGGER_MODE = 'fusion'  # make the engine collect full score vectors
+    config.FUSION_HALF_LIFE = args.half_life
+    config.FUSION_TRIGGER_THRESHOLD = args.threshold
+    engine = GestureEngine()
+    report = {'clips': [], 'summary': {}}
+    per_mode = {name: {'ttt': [], 'misses': 0, 'gestures': {}} for name in ('debounce', 'fusion')}
+
+    try:
+        for path in args.video:
+            detections, _ = run_engine(engine, path, args.max_frames)
+            clip = {'video': path}
+            for name in per_mode:
+                result = time_to_trigger(detections, fusion=(name == 'fusion'))
+                clip[name] = result
+                stats = per_mode[name]
+                if result['time_to_trigger'] is None:
+                    stats['misses'] += 1
+                else:
+                    stats['ttt'].append(result['time_to_trigger'])
+                    stats['gestures'][result['gesture']] = stats['gestures'].get(result['gesture'], 0) + 1
+            report['clips'].append(clip)
+            logger.info(f"{path}: debounce={clip['debounce']} fusion={clip['fusion']}")
+    finally:
+        engine.release()
+
+    for name, stats in per_mode.items():
+        report['summary'][name] = {
+            'median_time_to_trigger_ms': _ms(_median(stats['ttt'])),
+            'clips_without_trigger': stats['misses'],
+            'first_trigger_gestures': stats['gestures'],
+        }
+    return report
+
+
+def bench_tiles(args) -> Dict:
+    """Single downscaled frame vs tiled full-resolution inference: accuracy and latency."""
+    variants = {
+        'single': (lambda: GestureEngine(), True),
+        'tiled': (lambda: TiledGestureEngine(args.grid, args.overlap, args.max_tile_size, args.workers), False),
+    }
+    report = {'clips': [], 'summary': {}}
+    totals = {name: {'frames': 0, 'hands': 0, 'correct': 0, 'latencies': []} for name in variants}
+
+    for name, (make_engine, resize) in variants.items():
+        engine = make_engine()
+        try:
+            for path in args.video:
+                detections, latencies = run_engine(engine, path, args.max_frames, resize)
+                hands = [d for d in detections if d[1] is not None]
+                correct = [d for d in hands if args.expect and d[1] == args.expect]
+                stats = totals[name]
+                stats['frames'] += len(detections)
+                stats['hands'] += len(hands)
+                stats['correct'] += len(correct)
+                stats['latencies'].extend(latencies)
+                report['clips'].append({
+                    'video': path,
+                    'variant': name,
+                    'frames': len(detections),
+                    'hand_frames': len(hands),
+                    'expected_frames': len(correct) if args.expect else None,
+                    'latency_p50_ms': _ms(_percentile(latencies, 50)),
+                })
+                logger.info(f"{path} [{name}]: {len(hands)}/{len(detections)} 帧检测到手")
+        finally:
+            engine.release()
+
+    for name, stats in totals.items():
+        frames = stats['frames'] or 1
+        report['summary'][name] = {
+            'hand_detection_rate': round(stats['hands'] / frames, 3),
+            'expected_gesture_rate': round(stats['correct'] / frames, 3) if args.expect else None,
+            'latency_p50_ms': _ms(_percentile(stats['latencies'], 50)),
+            'latency_p95_ms': _ms(_percentile(stats['latencies'], 95)),
+        }
+    return report
+
+
+def bench_templates(args) -> Dict:
+    """Per-lookup latency of the template classifier (synthetic landmarks, no clips needed)."""
+    rng = np.random.default_rng(0)
+    landmarks = rng.random((args.templates + args.queries, 21, 3))
+    embeddings = normalize_landmarks(landmarks)
+
+    index = TemplateIndex(path='')
+    for start in range(0, args.templates, args.per_gesture):
+        index.add(f'GESTURE_{start // args.per_gesture}', embeddings[start:start + args.per_gesture])
+    classifier = TemplateClassifier(index)
+    queries = embeddings[args.templates:]
+
+    normalize_latencies, classify_latencies = [], []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        normalize_landmarks(landmarks[args.templates + i])
+        normalize_latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        classifier.classify(query)
+        classify_latencies.append(time.perf_counter() - started)
+
+    return {
+        'templates': len(index.labels),
+        'gestures': len(classifier.label_set),
+        'embedding_dim': EMBEDDING_DIM,
+        'queries': len(queries),
+        'normalize_p50_us': _us(_percentile(normalize_latencies, 50)),
+        'classify_p50_us': _us(_percentile(classify_latencies, 50)),
+        'classify_p99_us': _us(_percentile(classify_latencies, 99)),
+    }
+
+
+def _start_workers(count: int, base_port: int) -> List[subprocess.Popen]:
+    """Spawn inference_worker.py processes on localhost and wait until they listen."""
+    processes = [
+        subprocess.Popen([sys.executable, 'inference_worker.py', '--host', '127.0.0.1', '--port', str(base_port + i)])
+        for i in range(count)
+    ]
+    deadline = time.time() + 30
+    for i in range(count):
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', base_port + i), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or processes[i].poll() is not None:
+                    raise RuntimeError(f"推理节点 127.0.0.1:{base_port + i} 未能启动")
+                time.sleep(0.2)
+    return processes
+
+
+def bench_remote(args) -> Dict:
+    """Local inference vs pipelined remote workers, all on localhost."""
+    processes = _start_workers(args.workers, args.base_port)
+    variants = {
+        'local': lambda: GestureEngine(),
+        'remote': lambda: RemoteGestureEngine(
+            [f'127.0.0.1:{args.base_port + i}' for i in range(args.workers)],
+            max_in_flight=args.max_in_flight, timeout=args.timeout, jpeg_quality=args.jpeg_quality
+        ),
+    }
+    report = {'summary': {}}
+    outputs = {}
+
+    try:
+        for name, make_engine in variants.items():
+            engine = make_engine()
+            frames, elapsed, gestures = 0, 0.0, []
+            try:
+                for path in args.video:
+                    started = time.perf_counter()
+                    for clip_time, frame in read_clip(path, args.max_frames):
+                        if name == 'remote' and args.kill_after and frames == args.kill_after:
+                            logger.info(f"终止推理节点 127.0.0.1:{args.base_port}")
+                            processes[0].terminate()
+                        gesture, _ = engine.process_frame(frame, timestamp=clip_time)
+                        gestures.append(gesture)
+                        frames += 1
+                    elapsed += time.perf_counter() - started
+            finally:
+                engine.release()
+            outputs[name] = gestures
+            report['summary'][name] = {
+                'frames': frames,
+                'fps': round(frames / elapsed, 1) if elapsed else None,
+            }
+            if name == 'remote':
+                report['summary'][name].update(engine.stats)
+            logger.info(f"[{name}] {frames} 帧, {report['summary'][name]['fps']} FPS")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    # Remote results lag by max_in_flight frames; align before comparing
+    lag = args.max_in_flight
+    local, remote = outputs['local'], outputs['remote'][lag:]
+    compared = min(len(local), len(remote))
+    same = sum(1 for a, b in zip(local, remote) if a == b)
+    report['summary']['agreement'] = round(same / compared, 3) if compared else None
+    return report
+
+
+BENCHMARKS = {
+    'filter': bench_filter,
+    'fusion': bench_fusion,
+    'tiles': bench_tiles,
+    'templates': bench_templates,
+    'remote': bench_remote,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Offline benchmarks on recorded clips')
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+
+    def add_common(p):
+        p.add_argument('--video', action='append', required=True, help='Recorded clip (repeatable)')
+        p.add_argument('--max-frames', type=int, default=0, help='Limit frames per clip (0 = all)')
+        p.add_argument('--output', default=None, help='Write the JSON report to this file')
+        p.add_argument('--verbose', action='store_true', help='Keep INFO logs from the pipeline')
+
+    p = sub.add_parser('filter', help='One Euro landmark smoothing vs raw landmarks')
+    add_common(p)
+    p.add_argument('--min-cutoff', type=float, default=config.LANDMARK_FILTER_MIN_CUTOFF)
+    p.add_argument('--beta', type=float, default=config.LANDMARK_FILTER_BETA)
+
+    p = sub.add_parser('fusion', help='Top-1 debouncing vs temporal score fusion')
+    add_common(p)
+    p.add_argument('--half-life', type=float, default=config.FUSION_HALF_LIFE)
+    p.add_argument('--threshold', type=float, default=config.FUSION_TRIGGER_THRESHOLD)
+
+    p = sub.add_parser('tiles', help='Single downscaled frame vs tiled full-resolution inference')
+    add_common(p)
+    p.add_argument('--grid', default=config.TILE_GRID, help='Tile layout, COLSxROWS')
+    p.add_argument('--overlap', type=float, default=config.TILE_OVERLAP)
+    p.add_argument('--max-tile-size', type=int, default=config.TILE_MAX_SIZE)
+    p.add_argument('--workers', type=int, default=config.TILE_WORKERS)
+    p.add_argument('--expect', default=None,
+                   help='Gesture shown throughout the clips, for accuracy (e.g. OPEN_PALM)')
+
+    p = sub.add_parser('remote', help='Local inference vs remote workers on localhost')
+    add_common(p)
+    p.add_argument('--workers', type=int, default=2, help='Worker processes to spawn')
+    p.add_argument('--base-port', type=int, default=config.INFERENCE_WORKER_PORT)
+    p.add_argument('--max-in-flight', type=int, default=config.REMOTE_INFERENCE_MAX_IN_FLIGHT)
+    p.add_argument('--timeout', type=float, default=config.REMOTE_INFERENCE_TIMEOUT)
+    p.add_argument('--jpeg-quality', type=int, default=config.REMOTE_INFERENCE_JPEG_QUALITY)
+    p.add_argument('--kill-after', type=int, default=0,
+                   help='Terminate the first worker after this many frames to exercise fallback')
+
+    p = sub.add_parser('templates', help='Template classifier lookup latency')
+    p.add_argument('--templates', type=int, default=500, help='Number of synthetic templates')
+    p.add_argument('--per-gesture', type=int, default=50, help='Templates per synthetic gesture')
+    p.add_argument('--queries', type=int, default=2000)
+    p.add_argument('--output', default=None, help='Write the JSON report to this file')
+    p.add_argument('--verbose', action='store_true', help='Keep INFO logs from the pipeline')
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+
+    report = BENCHMARKS[args.benchmark](args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,7 @@ Removed: Expression detection, motion detection, visualization.
 """
 
 import os
+import json
 
 # ============================================================================
 # RTSP Configuration
@@ -25,8 +26,41 @@ MQTT_CLIENT_ID = 'gesture_control'
 # MQTT Topics
 MQTT_DISCOVERY_PREFIX = 'homeassistant'
 MQTT_STATE_TOPIC = 'mediapipe/gesture/state'
+MQTT_COMBO_TOPIC = 'mediapipe/gesture/combo'
+MQTT_ZONE_TOPIC_PREFIX = 'mediapipe/gesture/zone'     # + /<zone>/state
+MQTT_PROFILE_TOPIC = 'mediapipe/gesture/profile'  # command: capture duration in seconds
+MQTT_SNAPSHOT_TOPIC = 'mediapipe/gesture/snapshot'  # JPEG of the last triggering frame
 MQTT_DEVICE_NAME = 'gesture_control'
 
+# ============================================================================
+# Local Event Push Server (WebSocket / server-sent events, bypasses MQTT)
+# ============================================================================
+EVENT_SERVER_ENABLED = os.getenv('EVENT_SERVER_ENABLED', 'false').lower() == 'true'
+EVENT_SERVER_HOST = os.getenv('EVENT_SERVER_HOST', '0.0.0.0')
+EVENT_SERVER_PORT = int(os.getenv('EVENT_SERVER_PORT', '8765'))
+EVENT_SERVER_QUEUE_SIZE = int(os.getenv('EVENT_SERVER_QUEUE_SIZE', '64'))  # per client, then dropped
+
+# ============================================================================
+# Remote Inference Workers (inference_worker.py on another machine)
+# ============================================================================
+REMOTE_INFERENCE_WORKERS = [
+    w.strip() for w in os.getenv('REMOTE_INFERENCE_WORKERS', '').split(',') if w.strip()
+]  # host[:port], empty = local inference
+REMOTE_INFERENCE_MAX_IN_FLIGHT = int(os.getenv('REMOTE_INFERENCE_MAX_IN_FLIGHT', '1'))  # frames of result lag
+REMOTE_INFERENCE_TIMEOUT = float(os.getenv('REMOTE_INFERENCE_TIMEOUT', '1.0'))         # then local fallback
+REMOTE_INFERENCE_JPEG_QUALITY = int(os.getenv('REMOTE_INFERENCE_JPEG_QUALITY', '80'))
+INFERENCE_WORKER_PORT = int(os.getenv('INFERENCE_WORKER_PORT', '8766'))
+
+# ============================================================================
+# Debug MJPEG Stream (annotated frames, only encoded while a client watches)
+# ============================================================================
+DEBUG_STREAM_ENABLED = os.getenv('DEBUG_STREAM_ENABLED', 'false').lower() == 'true'
+DEBUG_STREAM_HOST = os.getenv('DEBUG_STREAM_HOST', '0.0.0.0')
+DEBUG_STREAM_PORT = int(os.getenv('DEBUG_STREAM_PORT', '8767'))
+DEBUG_STREAM_FPS = float(os.getenv('DEBUG_STREAM_FPS', '10'))
+DEBUG_STREAM_JPEG_QUALITY = int(os.getenv('DEBUG_STREAM_JPEG_QUALITY', '70'))
+DEBUG_SNAPSHOT_ENABLED = os.getenv('DEBUG_SNAPSHOT_ENABLED', 'false').lower() == 'true'  # MQTT camera
+
 # ============================================================================
 # Video Processing Configuration
 # ============================================================================
@@ -35,6 +69,23 @@ FRAME_HEIGHT = int(os.getenv('FRAME_HEIGHT', '240'))
 TARGET_FPS = int(os.getenv('TARGET_FPS', '15'))
 SKIP_FRAMES = int(os.getenv('SKIP_FRAMES', '1'))
 
+# Tiled inference for wide-angle / high-resolution cameras: the full frame is
+# split into overlapping tiles recognized concurrently (FRAME_WIDTH/HEIGHT
+# downscaling is skipped in this mode)
+TILED_INFERENCE_ENABLED = os.getenv('TILED_INFERENCE_ENABLED', 'false').lower() == 'true'
+TILE_GRID = os.getenv('TILE_GRID', '2x2')                    # columns x rows
+TILE_OVERLAP = float(os.getenv('TILE_OVERLAP', '0.2'))       # fraction of tile size
+TILE_MAX_SIZE = int(os.getenv('TILE_MAX_SIZE', '640'))       # longest tile side fed to recognizer
+TILE_WORKERS = int(os.getenv('TILE_WORKERS', '0'))           # 0 = one per tile (capped at CPU count)
+
+# Activation zones: only these regions of the frame are recognized.
+# JSON list, e.g. [{"name": "sofa", "points": "0.1,0.3 0.6,0.9", "entity": true}]
+# (2 points = rectangle corners, 3+ = polygon, normalized 0-1 coordinates)
+ACTIVATION_ZONES = json.loads(os.getenv('ACTIVATION_ZONES', '') or '[]')
+
+# Tiles and zones crop from the full-resolution frame instead of the resized one
+FULL_RESOLUTION_FRAMES = TILED_INFERENCE_ENABLED or bool(ACTIVATION_ZONES)
+
 # ============================================================================
 # Gesture Recognition Configuration
 # ============================================================================
@@ -42,6 +93,20 @@ GESTURE_CONFIDENCE_THRESHOLD = float(os.getenv('GESTURE_CONFIDENCE_THRESHOLD', '
 GESTURE_MIN_DETECTIONS = int(os.getenv('GESTURE_MIN_DETECTIONS', '2'))
 GESTURE_COOLDOWN = float(os.getenv('GESTURE_COOLDOWN', '1.5'))
 
+# Trigger mode: 'debounce' = N identical top-1 detections in a row (default)
+#               'fusion'   = accumulate full category scores with exponential decay
+GESTURE_TRIGGER_MODE = os.getenv('GESTURE_TRIGGER_MODE', 'debounce').lower()
+FUSION_HALF_LIFE = float(os.getenv('FUSION_HALF_LIFE', '0.3'))                  # seconds
+FUSION_TRIGGER_THRESHOLD = float(os.getenv('FUSION_TRIGGER_THRESHOLD', '1.5'))  # accumulated score
+
+# ============================================================================
+# Gesture Combos (sequences of triggered gestures)
+# JSON list, e.g. [{"name": "release", "sequence": "CLOSED_FIST>OPEN_PALM", "timeout": 2.0}]
+# ============================================================================
+GESTURE_COMBOS = json.loads(os.getenv('GESTURE_COMBOS', '') or '[]')
+# Also publish the single gestures that make up a combo immediately
+COMBO_EMIT_SINGLE = os.getenv('COMBO_EMIT_SINGLE', 'false').lower() == 'true'
+
 # ============================================================================
 # MediaPipe Gesture Recognizer Configuration (v2.1.2)
 # ============================================================================
@@ -49,6 +114,20 @@ MAX_NUM_HANDS = 1
 MIN_DETECTION_CONFIDENCE = float(os.getenv('MIN_DETECTION_CONFIDENCE', '0.5'))  # Google default
 MIN_TRACKING_CONFIDENCE = float(os.getenv('MIN_TRACKING_CONFIDENCE', '0.5'))    # Google default
 
+# ============================================================================
+# Landmark Smoothing (One Euro filter, applied before custom gesture checks)
+# ============================================================================
+LANDMARK_FILTER_ENABLED = os.getenv('LANDMARK_FILTER_ENABLED', 'true').lower() == 'true'
+LANDMARK_FILTER_MIN_CUTOFF = float(os.getenv('LANDMARK_FILTER_MIN_CUTOFF', '1.0'))  # Hz, lower = smoother
+LANDMARK_FILTER_BETA = float(os.getenv('LANDMARK_FILTER_BETA', '0.5'))              # higher = less lag on fast moves
+LANDMARK_FILTER_D_CUTOFF = float(os.getenv('LANDMARK_FILTER_D_CUTOFF', '1.0'))
+
+# ============================================================================
+# User-trained Gesture Templates (recorded with teach.py)
+# ============================================================================
+TEMPLATE_INDEX_PATH = os.getenv('TEMPLATE_INDEX_PATH', '/data/gesture_templates.npz')
+TEMPLATE_DISTANCE_THRESHOLD = float(os.getenv('TEMPLATE_DISTANCE_THRESHOLD', '0.25'))  # RMS, in hand-size units
+
 # ============================================================================
 # Gesture Toggles (8 gestures: 7 built-in + 1 custom)
 # v2.1.0: Google Gesture Recognizer (7 built-in gestures)
@@ -67,6 +146,15 @@ ENABLED_GESTURES = {
     'OK_SIGN': os.getenv('ENABLE_OK_SIGN', 'true').lower() == 'true',
 }
 
+# ============================================================================
+# On-demand Profiling (triggered by SIGUSR1 or MQTT_PROFILE_TOPIC)
+# ============================================================================
+PROFILE_OUTPUT_DIR = os.getenv('PROFILE_OUTPUT_DIR', '/data/profiles')
+PROFILE_DURATION = float(os.getenv('PROFILE_DURATION', '10'))          # default capture, seconds
+PROFILE_MAX_DURATION = float(os.getenv('PROFILE_MAX_DURATION', '60'))  # hard cap per capture
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))     # sampling interval
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '10'))                    # profiles kept on disk
+
 # ============================================================================
 # Logging Configuration
 # ============================================================================
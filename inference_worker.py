@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Remote inference worker.
+
+Runs GestureEngine behind a small TCP protocol (see src/remote_inference.py)
+so a low-power capture node can offload recognition to another machine on
+the LAN. Point the add-on at it with remote_inference_workers: ["host:8766"].
+
+Usage:
+    python3 inference_worker.py                     # listen on 0.0.0.0:8766
+    python3 inference_worker.py --port 8767         # several workers per host
+"""
+import argparse
+import signal
+import sys
+
+# CRITICAL: Suppress FFmpeg logs BEFORE importing cv2
+import suppress_ffmpeg_logs
+
+import logging
+
+import config
+from src.remote_inference import InferenceWorker
+
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('inference_worker')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Gesture recognition worker for remote inference')
+    parser.add_argument('--host', default='0.0.0.0', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=config.INFERENCE_WORKER_PORT, help='TCP port')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    worker = InferenceWorker(args.host, args.port)
+    try:
+        worker.start()
+    except OSError as e:
+        logger.error(f"推理节点启动失败: {e}")
+        return 1
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,9 +7,11 @@ Removed: Expression detection, motion detection, visualization
 
 import sys
 import os
+import signal
 import time
+import threading
 from collections import deque
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 # CRITICAL: Suppress FFmpeg logs BEFORE importing cv2
 import suppress_ffmpeg_logs
@@ -19,6 +21,13 @@ import logging
 
 import config
 from src.gesture_engine import GestureEngine
+from src.tiled_engine import TiledGestureEngine
+from src.remote_inference import RemoteGestureEngine
+from src.zones import ZonedGestureEngine
+from src.combo_matcher import ComboMatcher, MatchEvent
+from src.event_server import EventServer
+from src.debug_stream import DebugStream
+from src.profiler import SamplingProfiler
 from src.mqtt_client import MQTTClient
 
 # Additional suppression for OpenCV
@@ -62,6 +71,26 @@ class GestureBuffer:
         self.current_stable_gesture: Optional[str] = None
         self.last_triggered_gesture: Optional[str] = None
         self.last_trigger_time: float = 0
+        
+        # Whether the hand was lost or changed gesture since the last trigger;
+        # held_retrigger marks a trigger that only repeats a held gesture
+        self.released_since_trigger = True
+        self.held_retrigger = False
+        
+        # Let a released repeat of the last gesture skip the cooldown (set when
+        # combos are configured, so THUMBS_UP>THUMBS_UP can be done quickly)
+        self.release_skips_cooldown = False
+    
+    def _note_detection(self, gesture: Optional[str]):
+        """Track hand release between triggers (no hand or another gesture)."""
+        if gesture is None or gesture != self.last_triggered_gesture:
+            self.released_since_trigger = True
+    
+    def _mark_triggered(self, gesture: str, current_time: float):
+        self.held_retrigger = gesture == self.last_triggered_gesture and not self.released_since_trigger
+        self.released_since_trigger = False
+        self.last_triggered_gesture = gesture
+        self.last_trigger_time = current_time
     
     def add_detection(self, gesture: Optional[str], confidence: float) -> Optional[str]:
         """
@@ -78,10 +107,13 @@ class GestureBuffer:
         
         # If no hand detected or low confidence, clear history
         if gesture is None or confidence < self.confidence_threshold:
+            self._note_detection(None)
             self.gesture_history.clear()
             self.current_stable_gesture = None
             return None
         
+        self._note_detection(gesture)
+        
         # If gesture changed, clear history for fast response
         if self.gesture_history and gesture != self.gesture_history[-1]['gesture']:
             logger.debug(f"手势切换: {self.gesture_history[-1]['gesture']} → {gesture}, 清空缓冲区")
@@ -100,8 +132,7 @@ class GestureBuffer:
             # Check cooldown - don't trigger same gesture repeatedly
             if self._can_trigger(gesture, current_time):
                 logger.info(f"✓ 手势触发: {gesture} (置信度: {confidence:.2f})")
-                self.last_triggered_gesture = gesture
-                self.last_trigger_time = current_time
+                self._mark_triggered(gesture, current_time)
                 return gesture
             else:
                 logger.debug(f"手势 {gesture} 已稳定但处于冷却期")
@@ -155,6 +186,10 @@ class GestureBuffer:
         if gesture != self.last_triggered_gesture:
             return True
         
+        # Same gesture shown again after a release: a deliberate repeat
+        if self.release_skips_cooldown and self.released_since_trigger:
+            return True
+        
         # Same gesture: check cooldown period
         time_since_last_trigger = current_time - self.last_trigger_time
         if time_since_last_trigger < self.cooldown:
@@ -167,13 +202,113 @@ class GestureBuffer:
         return True
 
 
+class ScoreFusionBuffer(GestureBuffer):
+    """
+    Temporal score fusion alternative to top-1 debouncing.
+    
+    Every frame's full category score vector is added to a per-gesture
+    evidence total that decays exponentially with time. A gesture triggers as
+    soon as its evidence crosses the threshold and it leads every other
+    category, so a confident gesture can fire in fewer frames while brief
+    flips between close categories no longer throw the evidence away.
+    Cooldown semantics are inherited from GestureBuffer.
+    """
+    
+    def __init__(
+        self,
+        half_life: float = config.FUSION_HALF_LIFE,
+        trigger_threshold: float = config.FUSION_TRIGGER_THRESHOLD,
+        cooldown: float = config.GESTURE_COOLDOWN,
+        confidence_threshold: float = config.GESTURE_CONFIDENCE_THRESHOLD
+    ):
+        super().__init__(cooldown=cooldown, confidence_threshold=confidence_threshold)
+        self.half_life = half_life
+        self.trigger_threshold = trigger_threshold
+        
+        self.evidence: Dict[str, float] = {}
+        self.last_update_time: Optional[float] = None
+        self.trigger_confidence: float = 0.0
+    
+    def reset(self):
+        """Drop all accumulated evidence (hand lost or gesture triggered)."""
+        self.evidence.clear()
+        self.last_update_time = None
+        self.current_stable_gesture = None
+    
+    def add_detection(
+        self,
+        gesture: Optional[str],
+        confidence: float,
+        scores: Optional[Dict[str, float]] = None,
+        timestamp: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Add one frame's scores to the evidence.
+        
+        Args:
+            gesture: Top-1 gesture name (or None if no hand)
+            confidence: Top-1 confidence, used when scores is missing
+            scores: Full gesture -> score distribution for the frame
+            timestamp: Frame time in seconds (defaults to now)
+            
+        Returns:
+            Gesture name if it should be triggered, None otherwise.
+            The fused confidence is left in self.trigger_confidence.
+        """
+        current_time = time.time() if timestamp is None else timestamp
+        self._note_detection(gesture)
+        
+        # No hand: evidence does not carry across, same as GestureBuffer
+        if gesture is None:
+            self.reset()
+            return None
+        
+        if scores is None:
+            scores = {gesture: confidence}
+        
+        # Decay existing evidence by elapsed time, then add this frame
+        if self.last_update_time is not None and self.half_life > 0:
+            decay = 0.5 ** ((current_time - self.last_update_time) / self.half_life)
+            for name in self.evidence:
+                self.evidence[name] *= decay
+        self.last_update_time = current_time
+        
+        for name, score in scores.items():
+            self.evidence[name] = self.evidence.get(name, 0.0) + score
+        
+        # 'NONE' competes for evidence but never triggers
+        leader = max(self.evidence, key=self.evidence.get)
+        if leader == 'NONE' or self.evidence[leader] < self.trigger_threshold:
+            return None
+        
+        total = sum(self.evidence.values())
+        fused_confidence = self.evidence[leader] / total if total > 0 else 0.0
+        if fused_confidence < self.confidence_threshold:
+            return None
+        
+        self.current_stable_gesture = leader
+        if not self._can_trigger(leader, current_time):
+            logger.debug(f"手势 {leader} 证据已足够但处于冷却期")
+            return None
+        
+        logger.info(
+            f"✓ 手势触发 (融合): {leader} "
+            f"(证据: {self.evidence[leader]:.2f}, 置信度: {fused_confidence:.2f})"
+        )
+        self._mark_triggered(leader, current_time)
+        self.trigger_confidence = fused_confidence
+        self.reset()
+        return leader
+
+
 class VideoStreamProcessor:
     """
     Handles RTSP video stream connection and frame processing.
     """
     
-    def __init__(self, rtsp_url: str):
+    def __init__(self, rtsp_url: str, resize: bool = True):
         self.rtsp_url = rtsp_url
+        self.resize = resize  # False keeps full resolution (tiles / activation zones)
         self.cap = None
         self.frame_count = 0
         self.processed_frame_count = 0
@@ -241,7 +376,7 @@ class VideoStreamProcessor:
                 return None
             
             # Resize frame if needed
-            if config.FRAME_WIDTH and config.FRAME_HEIGHT:
+            if self.resize and config.FRAME_WIDTH and config.FRAME_HEIGHT:
                 frame = cv2.resize(frame, (config.FRAME_WIDTH, config.FRAME_HEIGHT))
             
             self.processed_frame_count += 1
@@ -258,8 +393,91 @@ class VideoStreamProcessor:
             logger.info("释放视频流资源")
 
 
-def main():
-    """主应用程序循环"""
+def make_gesture_buffer() -> GestureBuffer:
+    """Create the trigger buffer selected by GESTURE_TRIGGER_MODE."""
+    if config.GESTURE_TRIGGER_MODE == 'fusion':
+        return ScoreFusionBuffer()
+    return GestureBuffer()
+
+
+def detect_trigger(
+    gesture_buffer: GestureBuffer,
+    gesture: Optional[str],
+    confidence: float,
+    scores: Optional[Dict[str, float]] = None
+) -> Tuple[Optional[str], float]:
+    """Feed one frame's result to the buffer; return (triggered gesture or None, its confidence)."""
+    if isinstance(gesture_buffer, ScoreFusionBuffer):
+        # Fusion keeps 'NONE' frames: their scores count against other gestures
+        triggered_gesture = gesture_buffer.add_detection(gesture, confidence, scores)
+        return triggered_gesture, gesture_buffer.trigger_confidence
+    # Filter out 'NONE' - treat it as no valid gesture detected
+    if gesture and gesture != 'NONE':
+        return gesture_buffer.add_detection(gesture, confidence), confidence
+    # No valid gesture, clear buffer
+    if gesture == 'NONE':
+        logger.debug("检测到 NONE，作为 None 处理，清空 buffer")
+    gesture_buffer.add_detection(None, 0.0)
+    return None, confidence
+
+
+def route_trigger(
+    combo_matcher: Optional[ComboMatcher],
+    gesture_buffer: GestureBuffer,
+    triggered_gesture: Optional[str],
+    trigger_confidence: float,
+    now: float
+) -> List[MatchEvent]:
+    """Turn this frame's trigger (if any) into events, via the combo matcher when enabled."""
+    if combo_matcher is None:
+        return [('gesture', triggered_gesture, trigger_confidence)] if triggered_gesture else []
+    if triggered_gesture and gesture_buffer.held_retrigger:
+        # A held gesture re-firing after the cooldown is not a new
+        # gesture: it ends any sequence in progress instead of extending it
+        return combo_matcher.interrupt() + [('gesture', triggered_gesture, trigger_confidence)]
+    if triggered_gesture:
+        return combo_matcher.feed(triggered_gesture, trigger_confidence, now)
+    return combo_matcher.poll(now)
+
+
+def publish_events(
+    mqtt_client: MQTTClient,
+    events: List[MatchEvent],
+    event_server: Optional[EventServer] = None,
+    zone: Optional[str] = None
+):
+    """
+    Publish single gestures and combos to MQTT and the local event server.
+    Events of an entity zone go to the zone's sensor and carry its name.
+    """
+    for kind, name, confidence in events:
+        if kind == 'combo':
+            mqtt_client.publish_combo(name, confidence, zone=zone)
+            if event_server is not None:
+                event_server.publish_combo(name, confidence, zone=zone)
+        else:
+            if zone is None:
+                mqtt_client.publish_gesture(name, confidence)
+            else:
+                mqtt_client.publish_zone_gesture(zone, name, confidence)
+            if event_server is not None:
+                event_server.publish_gesture(name, confidence, zone=zone)
+
+
+def main(
+    gesture_engine: Optional[GestureEngine] = None,
+    mqtt_client: Optional[MQTTClient] = None,
+    gesture_buffer: Optional[GestureBuffer] = None,
+    video_processor: Optional[VideoStreamProcessor] = None,
+    stop_event: Optional[threading.Event] = None
+):
+    """
+    主应用程序循环
+
+    All components are created from config when not supplied. Passing them in
+    (and a stop_event to end the loop) lets tools such as soak.py run the
+    real loop against file-backed streams and a local MQTT stand-in.
+    """
     logger.info("="*60)
     logger.info("║ MediaPipe 手势识别 v2.1.3")
     logger.info("║ Google Gesture Recognizer (高精度模型)")
@@ -269,16 +487,76 @@ def main():
     logger.info(f"RTSP URL: {config.RTSP_URL}")
     logger.info(f"MQTT Broker: {config.MQTT_BROKER}:{config.MQTT_PORT}")
     logger.info(f"目标 FPS: {config.TARGET_FPS}")
-    logger.info(f"画面大小: {config.FRAME_WIDTH}x{config.FRAME_HEIGHT}")
+    if config.ACTIVATION_ZONES:
+        logger.info(f"画面大小: 原始分辨率 (激活区域 {len(config.ACTIVATION_ZONES)} 个)")
+    elif config.TILED_INFERENCE_ENABLED:
+        logger.info(f"画面大小: 原始分辨率 (分块 {config.TILE_GRID})")
+    else:
+        logger.info(f"画面大小: {config.FRAME_WIDTH}x{config.FRAME_HEIGHT}")
     logger.info(f"跳帧处理: 每 {config.SKIP_FRAMES} 帧处理一次")
     logger.info(f"IMAGE 模式: 实时低延迟 + 主动丢帧")
+    logger.info(f"触发模式: {config.GESTURE_TRIGGER_MODE}")
+    if config.REMOTE_INFERENCE_WORKERS:
+        logger.info(f"远程推理节点: {', '.join(config.REMOTE_INFERENCE_WORKERS)}")
     logger.info("="*60)
     
     # Initialize components
-    gesture_engine = GestureEngine()
-    mqtt_client = MQTTClient()
-    gesture_buffer = GestureBuffer()
-    video_processor = VideoStreamProcessor(config.RTSP_URL)
+    if gesture_engine is None:
+        if config.REMOTE_INFERENCE_WORKERS and (config.ACTIVATION_ZONES or config.TILED_INFERENCE_ENABLED):
+            logger.warning("远程推理不支持激活区域和分块推理，使用本地推理")
+        if config.ACTIVATION_ZONES:
+            if config.TILED_INFERENCE_ENABLED:
+                logger.warning("已配置激活区域，忽略分块推理")
+            gesture_engine = ZonedGestureEngine(config.ACTIVATION_ZONES)
+        elif config.TILED_INFERENCE_ENABLED:
+            gesture_engine = TiledGestureEngine()
+        elif config.REMOTE_INFERENCE_WORKERS:
+            gesture_engine = RemoteGestureEngine()
+        else:
+            gesture_engine = GestureEngine()
+    mqtt_client = mqtt_client or MQTTClient()
+    if gesture_buffer is None:
+        gesture_buffer = make_gesture_buffer()
+    
+    # Activation zones with their own entity get their own trigger and combo state
+    zone_buffers: Dict[str, GestureBuffer] = {}
+    zone_matchers: Dict[str, ComboMatcher] = {}
+    if isinstance(gesture_engine, ZonedGestureEngine):
+        zone_buffers = {zone: make_gesture_buffer() for zone in gesture_engine.entity_zones}
+        mqtt_client.zone_entities = list(zone_buffers)
+    video_processor = video_processor or VideoStreamProcessor(
+        config.RTSP_URL, resize=not config.FULL_RESOLUTION_FRAMES
+    )
+    combo_matcher = None
+    if config.GESTURE_COMBOS:
+        combo_matcher = ComboMatcher(config.GESTURE_COMBOS, emit_single=config.COMBO_EMIT_SINGLE)
+        mqtt_client.combo_names = combo_matcher.combo_names
+        # Repeat combos need a released repeat to count before the cooldown ends;
+        # holding the gesture still only re-fires once per cooldown
+        gesture_buffer.release_skips_cooldown = True
+        for zone, zone_buffer in zone_buffers.items():
+            zone_matchers[zone] = ComboMatcher(config.GESTURE_COMBOS, emit_single=config.COMBO_EMIT_SINGLE)
+            zone_buffer.release_skips_cooldown = True
+    event_server = EventServer() if config.EVENT_SERVER_ENABLED else None
+    
+    # Annotated debug view; costs nothing until a viewer connects or a trigger fires
+    debug_stream = None
+    if config.DEBUG_STREAM_ENABLED or config.DEBUG_SNAPSHOT_ENABLED:
+        debug_stream = DebugStream(
+            snapshot_callback=mqtt_client.publish_snapshot if config.DEBUG_SNAPSHOT_ENABLED else None
+        )
+        mqtt_client.snapshot_enabled = config.DEBUG_SNAPSHOT_ENABLED
+    # Tiled and zoned engines always keep landmarks; the others only on request
+    toggle_landmarks = isinstance(gesture_engine, (GestureEngine, RemoteGestureEngine))
+    
+    # On-demand profiling of this loop: `kill -USR1 <pid>` or MQTT command
+    profiler = SamplingProfiler()
+    profiler.attach()
+    mqtt_client.on_profile_request = profiler.start
+    try:
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.start())
+    except (ValueError, AttributeError):
+        pass  # Not the main thread (e.g. soak test cameras) or no SIGUSR1 on this platform
     
     # Connect to MQTT
     if not mqtt_client.connect():
@@ -287,13 +565,18 @@ def main():
     
     logger.info("MQTT 连接成功")
     
+    if event_server is not None and not event_server.start():
+        event_server = None
+    if debug_stream is not None:
+        debug_stream.start(serve=config.DEBUG_STREAM_ENABLED)  # snapshots still work if the port is taken
+    
     # Main loop
     consecutive_failures = 0
     max_consecutive_failures = 10
     last_log_time = time.time()
     
     try:
-        while True:
+        while stop_event is None or not stop_event.is_set():
             # Connect to video stream if not connected
             if not video_processor.cap or not video_processor.cap.isOpened():
                 logger.info("视频流未连接，尝试连接...")
@@ -318,19 +601,44 @@ def main():
             consecutive_failures = 0
             
             # Process gesture recognition (IMAGE mode - no timestamp needed)
+            if debug_stream is not None and toggle_landmarks:
+                gesture_engine.keep_landmarks = debug_stream.wants_landmarks
             gesture, confidence = gesture_engine.process_frame(frame)
+            # Annotate the frame the result belongs to; remote results lag the input
+            result_frame = gesture_engine.last_frame
+            if debug_stream is not None and result_frame is not None:
+                debug_stream.submit(result_frame, gesture, confidence, gesture_engine.last_landmarks)
             
             # Check if gesture should be triggered
-            # Filter out 'NONE' - treat it as no valid gesture detected
-            if gesture and gesture != 'NONE':
-                triggered_gesture = gesture_buffer.add_detection(gesture, confidence)
-                if triggered_gesture:
-                    mqtt_client.publish_gesture(triggered_gesture, confidence)
-            else:
-                # No valid gesture, clear buffer
-                if gesture == 'NONE':
-                    logger.debug("检测到 NONE，作为 None 处理，清空 buffer")
-                gesture_buffer.add_detection(None, 0.0)
+            triggered_gesture, trigger_confidence = detect_trigger(
+                gesture_buffer, gesture, confidence, gesture_engine.last_scores
+            )
+            
+            # Entity zones trigger, combine and publish on their own sensor
+            for zone, zone_buffer in zone_buffers.items():
+                zone_gesture, zone_confidence, zone_scores = gesture_engine.last_zone_results.get(
+                    zone, (None, 0.0, None)
+                )
+                zone_trigger, zone_trigger_confidence = detect_trigger(
+                    zone_buffer, zone_gesture, zone_confidence, zone_scores
+                )
+                zone_events = route_trigger(
+                    zone_matchers.get(zone), zone_buffer, zone_trigger, zone_trigger_confidence, time.time()
+                )
+                if zone_events:
+                    publish_events(mqtt_client, zone_events, event_server, zone=zone)
+            
+            if event_server is not None:
+                event_server.publish_frame(gesture, confidence)
+            
+            # Publish single gestures directly, or route them through the combo matcher
+            events = route_trigger(
+                combo_matcher, gesture_buffer, triggered_gesture, trigger_confidence, time.time()
+            )
+            if events:
+                publish_events(mqtt_client, events, event_server)
+            if triggered_gesture and debug_stream is not None and result_frame is not None:
+                debug_stream.snapshot(result_frame, triggered_gesture, trigger_confidence, gesture_engine.last_landmarks)
             
             # Periodic logging (every 20 frames or 5 seconds)
             current_time = time.time()
@@ -354,6 +662,11 @@ def main():
         logger.info("清理资源...")
         gesture_engine.release()
         video_processor.release()
+        if event_server is not None:
+            event_server.stop()
+        if debug_stream is not None:
+            debug_stream.stop()
+        profiler.stop()
         mqtt_client.disconnect()
         logger.info("程序已退出")
 
@@ -49,6 +49,74 @@ export ENABLE_THUMBS_UP=$(jq -r '.enable_thumbs_up // true' $CONFIG_PATH)
 export ENABLE_PEACE=$(jq -r '.enable_peace // true' $CONFIG_PATH)
 export ENABLE_I_LOVE_YOU=$(jq -r '.enable_i_love_you // true' $CONFIG_PATH)
 
+# ============================================================================
+# Landmark Smoothing (One Euro filter)
+# ============================================================================
+export LANDMARK_FILTER_ENABLED=$(jq -r 'if .landmark_filter_enabled == null then true else .landmark_filter_enabled end' $CONFIG_PATH)
+export LANDMARK_FILTER_MIN_CUTOFF=$(jq -r '.landmark_filter_min_cutoff // 1.0' $CONFIG_PATH)
+export LANDMARK_FILTER_BETA=$(jq -r '.landmark_filter_beta // 0.5' $CONFIG_PATH)
+
+# ============================================================================
+# Trigger Mode (debounce / score fusion)
+# ============================================================================
+export GESTURE_TRIGGER_MODE=$(jq -r '.gesture_trigger_mode // "debounce"' $CONFIG_PATH)
+export FUSION_HALF_LIFE=$(jq -r '.fusion_half_life // 0.3' $CONFIG_PATH)
+export FUSION_TRIGGER_THRESHOLD=$(jq -r '.fusion_trigger_threshold // 1.5' $CONFIG_PATH)
+
+# ============================================================================
+# Tiled Inference (wide-angle / high-resolution cameras)
+# ============================================================================
+export TILED_INFERENCE_ENABLED=$(jq -r '.tiled_inference_enabled // false' $CONFIG_PATH)
+export TILE_GRID=$(jq -r '.tile_grid // "2x2"' $CONFIG_PATH)
+export TILE_OVERLAP=$(jq -r '.tile_overlap // 0.2' $CONFIG_PATH)
+export TILE_MAX_SIZE=$(jq -r '.tile_max_size // 640' $CONFIG_PATH)
+export TILE_WORKERS=$(jq -r '.tile_workers // 0' $CONFIG_PATH)
+
+# ============================================================================
+# Gesture Combos
+# ============================================================================
+export GESTURE_COMBOS=$(jq -c '.combos // []' $CONFIG_PATH)
+export COMBO_EMIT_SINGLE=$(jq -r '.combo_emit_single // false' $CONFIG_PATH)
+
+# ============================================================================
+# Local Event Push Server (WebSocket / SSE)
+# ============================================================================
+export EVENT_SERVER_ENABLED=$(jq -r '.event_server_enabled // false' $CONFIG_PATH)
+export EVENT_SERVER_PORT=$(jq -r '.event_server_port // 8765' $CONFIG_PATH)
+export EVENT_SERVER_QUEUE_SIZE=$(jq -r '.event_server_queue_size // 64' $CONFIG_PATH)
+
+# ============================================================================
+# On-demand Profiling
+# ============================================================================
+export PROFILE_DURATION=$(jq -r '.profile_duration // 10' $CONFIG_PATH)
+export PROFILE_INTERVAL_MS=$(jq -r '.profile_interval_ms // 5' $CONFIG_PATH)
+
+# ============================================================================
+# Activation Zones
+# ============================================================================
+export ACTIVATION_ZONES=$(jq -c '.activation_zones // []' $CONFIG_PATH)
+
+# ============================================================================
+# User-trained Gesture Templates
+# ============================================================================
+export TEMPLATE_DISTANCE_THRESHOLD=$(jq -r '.template_distance_threshold // 0.25' $CONFIG_PATH)
+
+# ============================================================================
+# Remote Inference Workers
+# ============================================================================
+export REMOTE_INFERENCE_WORKERS=$(jq -r '.remote_inference_workers // [] | join(",")' $CONFIG_PATH)
+export REMOTE_INFERENCE_MAX_IN_FLIGHT=$(jq -r '.remote_inference_max_in_flight // 1' $CONFIG_PATH)
+export REMOTE_INFERENCE_TIMEOUT=$(jq -r '.remote_inference_timeout // 1.0' $CONFIG_PATH)
+export REMOTE_INFERENCE_JPEG_QUALITY=$(jq -r '.remote_inference_jpeg_quality // 80' $CONFIG_PATH)
+
+# ============================================================================
+# Debug MJPEG Stream / Trigger Snapshots
+# ============================================================================
+export DEBUG_STREAM_ENABLED=$(jq -r '.debug_stream_enabled // false' $CONFIG_PATH)
+export DEBUG_STREAM_PORT=$(jq -r '.debug_stream_port // 8767' $CONFIG_PATH)
+export DEBUG_STREAM_FPS=$(jq -r '.debug_stream_fps // 10' $CONFIG_PATH)
+export DEBUG_SNAPSHOT_ENABLED=$(jq -r '.debug_snapshot_enabled // false' $CONFIG_PATH)
+
 # ============================================================================
 # Logging Configuration
 # ============================================================================
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+Long-running soak test for the gesture detection loop.
+
+Runs the real main() loop for one or more synthetic cameras backed by looping
+local video files, with a local in-process MQTT stand-in that records every
+publish. Process health (RSS, open file descriptors, thread count, buffer
+depths, trigger latency) is sampled periodically; a leak or drift turns into
+a failed report and a non-zero exit code.
+
+Usage:
+    python3 soak.py --video clip.mp4 --cameras 2 --fps 15 --duration 4h
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# CRITICAL: Suppress FFmpeg logs BEFORE importing cv2
+import suppress_ffmpeg_logs
+
+import cv2
+import logging
+
+import config
+import main as app
+from src.mqtt_client import MQTTClient
+
+logger = logging.getLogger('soak')
+
+
+# ============================================================================
+# File-backed video source
+# ============================================================================
+
+class LoopingFileCapture:
+    """
+    cv2.VideoCapture look-alike that rewinds a local video file at EOF,
+    so a short clip can stand in for an endless RTSP stream.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.loops = 0
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def set(self, prop_id, value) -> bool:
+        # Stream tuning (buffer size, fps) has no meaning for a file
+        return True
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.loops += 1
+
+    def grab(self) -> bool:
+        if self.cap.grab():
+            return True
+        self._rewind()
+        return self.cap.grab()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self._rewind()
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class FileStreamProcessor(app.VideoStreamProcessor):
+    """
+    VideoStreamProcessor reading from a looping file instead of RTSP.
+    Records when the last frame was read so trigger latency can be measured.
+    """
+
+    def __init__(self, video_path: str):
+        super().__init__(video_path, resize=not config.FULL_RESOLUTION_FRAMES)
+        self.last_frame_time: float = 0.0
+
+    def connect(self) -> bool:
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = LoopingFileCapture(self.rtsp_url)
+        if not self.cap.isOpened():
+            logger.error(f"无法打开视频文件: {self.rtsp_url}")
+            return False
+        return True
+
+    def read_frame(self):
+        frame = super().read_frame()
+        if frame is not None:
+            self.last_frame_time = time.monotonic()
+        return frame
+
+
+# ============================================================================
+# In-process MQTT stand-in
+# ============================================================================
+
+class RecordingBroker:
+    """
+    Local MQTT broker stand-in. Every publish from every camera is counted
+    and, optionally, appended to a JSON-lines log on disk (kept off the heap
+    so the recorder itself cannot look like a leak).
+    """
+
+    def __init__(self, log_path: Optional[str] = None, latency_window: int = 1000):
+        self.lock = threading.Lock()
+        self.publish_count = 0
+        self.trigger_count = 0
+        self.latencies = deque(maxlen=latency_window)
+        self.log_file = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def record(self, camera: int, topic: str, payload: str, latency: Optional[float]):
+        with self.lock:
+            self.publish_count += 1
+            if latency is not None:
+                self.trigger_count += 1
+                self.latencies.append(latency)
+            if self.log_file:
+                self.log_file.write(json.dumps({
+                    'camera': camera,
+                    'topic': topic,
+                    'payload': payload,
+                    'latency': latency,
+                    'time': time.time()
+                }) + '\n')
+
+    def drain_latencies(self) -> List[float]:
+        """Return and forget latencies recorded since the last call."""
+        with self.lock:
+            latencies = list(self.latencies)
+            self.latencies.clear()
+            return latencies
+
+    def close(self):
+        if self.log_file:
+            self.log_file.close()
+
+
+class _PublishResult:
+    rc = 0  # mqtt.MQTT_ERR_SUCCESS
+
+
+class RecordingPahoClient:
+    """
+    Replaces paho's mqtt.Client inside a real MQTTClient, so the production
+    publish path (payload building, JSON encoding) runs unchanged.
+    """
+
+    def __init__(self, broker: RecordingBroker, camera: int, processor: FileStreamProcessor):
+        self.broker = broker
+        self.camera = camera
+        self.processor = processor
+        self.on_connect = None
+        self.on_disconnect = None
+
+    def connect(self, host, port, keepalive=60):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0)
+
+    def subscribe(self, topic, qos=0):
+        pass
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        latency = None
+        if topic == config.MQTT_STATE_TOPIC and self.processor.last_frame_time:
+            latency = time.monotonic() - self.processor.last_frame_time
+        self.broker.record(self.camera, topic, payload, latency)
+        return _PublishResult()
+
+
+def make_mqtt_client(broker: RecordingBroker, camera: int, processor: FileStreamProcessor) -> MQTTClient:
+    client = MQTTClient()
+    stand_in = RecordingPahoClient(broker, camera, processor)
+    stand_in.on_connect = client._on_connect
+    stand_in.on_disconnect = client._on_disconnect
+    client.client = stand_in
+    return client
+
+
+# ============================================================================
+# Process sampling
+# ============================================================================
+
+def _proc_status(field: str) -> Optional[int]:
+    """Read an integer field (e.g. VmRSS in kB, Threads) from /proc/self/status."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _open_fds() -> Optional[int]:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def take_sample(started: float, broker: RecordingBroker,
+                buffers: List[app.GestureBuffer],
+                processors: List[FileStreamProcessor]) -> Dict:
+    rss_kb = _proc_status('VmRSS')
+    latencies = broker.drain_latencies()
+    return {
+        'elapsed': round(time.monotonic() - started, 1),
+        'rss_mb': round(rss_kb / 1024.0, 2) if rss_kb is not None else None,
+        'open_fds': _open_fds(),
+        'threads': _proc_status('Threads') or threading.active_count(),
+        'python_threads': threading.active_count(),
+        'buffer_depths': [len(b.gesture_history) for b in buffers],
+        'processed_frames': sum(p.processed_frame_count for p in processors),
+        'publishes': broker.publish_count,
+        'triggers': broker.trigger_count,
+        'latency_p50_ms': _ms(_percentile(latencies, 50)),
+        'latency_p95_ms': _ms(_percentile(latencies, 95)),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000.0, 2) if seconds is not None else None
+
+
+# ============================================================================
+# Drift analysis
+# ============================================================================
+
+def _slope_per_hour(samples: List[Dict], key: str) -> Optional[float]:
+    """Least-squares slope of samples[key] against elapsed time, per hour."""
+    points = [(s['elapsed'], s[key]) for s in samples if s.get(key) is not None]
+    if len(points) < 3:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return cov / var_x * 3600.0
+
+
+def _window_mean(samples: List[Dict], key: str) -> Optional[float]:
+    values = [s[key] for s in samples if s.get(key) is not None]
+    return sum(values) / len(values) if values else None
+
+
+MIN_STEADY_SAMPLES = 3
+
+
+def analyse(samples: List[Dict], args) -> Dict:
+    """Turn the sample series into pass/fail checks."""
+    steady = [s for s in samples if s['elapsed'] >= args.warmup]
+    checks = []
+
+    def check(name: str, value, limit, failed: bool):
+        checks.append({'check': name, 'value': value, 'limit': limit, 'passed': not failed})
+
+    # Without enough evidence the drift checks below cannot fail, so fail here
+    check('post_warmup_samples', len(steady), f'>= {MIN_STEADY_SAMPLES}', len(steady) < MIN_STEADY_SAMPLES)
+
+    rss_slope = _slope_per_hour(steady, 'rss_mb')
+    check('rss_growth_mb_per_hour', rss_slope, args.max_rss_growth,
+          rss_slope is not None and rss_slope > args.max_rss_growth)
+
+    for key, limit in (('open_fds', args.max_fd_growth), ('threads', args.max_thread_growth)):
+        values = [s[key] for s in steady if s.get(key) is not None]
+        growth = values[-1] - values[0] if len(values) >= 2 else None
+        check(f'{key}_growth', growth, limit, growth is not None and growth > limit)
+
+    # Trigger latency is only measured when the clip makes gestures fire
+    before = [s['triggers'] for s in samples if s['elapsed'] < args.warmup]
+    triggers = steady[-1]['triggers'] - (before[-1] if before else 0) if steady else 0
+    check('post_warmup_triggers', triggers, '> 0', triggers <= 0)
+
+    # Latency drift: compare the last third of the run against the first third;
+    # a window without any latency data is no evidence, so it fails
+    third = max(1, len(steady) // 3)
+    early = _window_mean(steady[:third], 'latency_p95_ms')
+    late = _window_mean(steady[-third:], 'latency_p95_ms')
+    ratio = round(late / early, 2) if early and late else None
+    check('latency_p95_drift_ratio', ratio, args.max_latency_drift,
+          ratio is None or ratio > args.max_latency_drift)
+
+    frames = [s['processed_frames'] for s in steady]
+    stalled = len(frames) >= 2 and frames[-1] == frames[0]
+    check('frames_progressing', frames[-1] - frames[0] if len(frames) >= 2 else None, '> 0', stalled)
+
+    return {
+        'passed': all(c['passed'] for c in checks),
+        'checks': checks,
+    }
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+def parse_duration(text: str) -> float:
+    """Parse '90', '90s', '30m' or '4h' into seconds."""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def run(args) -> int:
+    config.TARGET_FPS = args.fps
+
+    broker = RecordingBroker(args.publish_log)
+    stop_event = threading.Event()
+    buffers, processors, threads = [], [], []
+
+    for camera in range(args.cameras):
+        video = args.video[camera % len(args.video)]
+        processor = FileStreamProcessor(video)
+        buffer = app.make_gesture_buffer()
+        mqtt_client = make_mqtt_client(broker, camera, processor)
+        thread = threading.Thread(
+            target=app.main,
+            kwargs={
+                'mqtt_client': mqtt_client,
+                'gesture_buffer': buffer,
+                'video_processor': processor,
+                'stop_event': stop_event,
+            },
+            name=f'camera-{camera}',
+            daemon=True
+        )
+        buffers.append(buffer)
+        processors.append(processor)
+        threads.append(thread)
+
+    logger.info(f"Soak 测试: {args.cameras} 路摄像头, {args.fps} FPS, 时长 {args.duration:.0f}s")
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    samples = []
+    threads_alive = len(threads)
+    try:
+        while time.monotonic() - started < args.duration:
+            time.sleep(args.sample_interval)
+            sample = take_sample(started, broker, buffers, processors)
+            samples.append(sample)
+            logger.info(f"采样: {json.dumps(sample)}")
+            if not any(t.is_alive() for t in threads):
+                logger.error("所有检测线程已退出")
+                break
+    except KeyboardInterrupt:
+        logger.info("收到停止信号，生成报告...")
+    finally:
+        # Detection threads only end on their own if main() failed
+        threads_alive = sum(1 for t in threads if t.is_alive())
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=10)
+        broker.close()
+
+    result = analyse(samples, args)
+    if threads_alive < len(threads):
+        logger.error(f"{len(threads) - threads_alive} 个检测线程在测试结束前退出")
+        result['checks'].append({'check': 'threads_alive_until_end', 'value': threads_alive,
+                                 'limit': len(threads), 'passed': False})
+        result['passed'] = False
+    if any(t.is_alive() for t in threads):
+        result['checks'].append({'check': 'clean_shutdown', 'value': False, 'limit': True, 'passed': False})
+        result['passed'] = False
+
+    report = {
+        'config': {
+            'videos': args.video,
+            'cameras': args.cameras,
+            'fps': args.fps,
+            'duration': args.duration,
+            'sample_interval': args.sample_interval,
+            'warmup': args.warmup,
+        },
+        'result': result,
+        'samples': samples,
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for c in result['checks']:
+        mark = '✓' if c['passed'] else '✗'
+        logger.info(f"{mark} {c['check']}: {c['value']} (限制: {c['limit']})")
+    logger.info(f"{'PASSED' if result['passed'] else 'FAILED'} - 报告已写入 {args.report}")
+    return 0 if result['passed'] else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Soak test the gesture detection loop')
+    parser.add_argument('--video', action='append', required=True,
+                        help='Local video file to loop (repeat to cycle several clips across cameras)')
+    parser.add_argument('--cameras', type=int, default=1, help='Number of synthetic cameras')
+    parser.add_argument('--fps', type=int, default=config.TARGET_FPS, help='Target FPS per camera')
+    parser.add_argument('--duration', type=parse_duration, default=parse_duration('1h'),
+                        help='Run time, e.g. 600, 30m, 4h')
+    parser.add_argument('--sample-interval', type=parse_duration, default=30.0,
+                        help='Seconds between health samples')
+    parser.add_argument('--warmup', type=parse_duration, default=120.0,
+                        help='Seconds excluded from drift analysis')
+    parser.add_argument('--max-rss-growth', type=float, default=10.0,
+                        help='Allowed RSS growth in MB per hour')
+    parser.add_argument('--max-fd-growth', type=int, default=5,
+                        help='Allowed growth in open file descriptors')
+    parser.add_argument('--max-thread-growth', type=int, default=2,
+                        help='Allowed growth in OS thread count')
+    parser.add_argument('--max-latency-drift', type=float, default=1.5,
+                        help='Allowed ratio of late vs early p95 trigger latency')
+    parser.add_argument('--report', default='soak_report.json', help='JSON report path')
+    parser.add_argument('--publish-log', default=None,
+                        help='Optional JSON-lines file recording every MQTT publish')
+    return parser
+
+
+def parse_args(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.duration <= args.warmup:
+        parser.error(f'--duration ({args.duration:.0f}s) must be longer than --warmup ({args.warmup:.0f}s)')
+    return args
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))
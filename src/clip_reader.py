@@ -0,0 +1,28 @@
+from typing import Iterator, Tuple
+import cv2
+import numpy as np
+import config
+
+
+def read_clip(path: str, max_frames: int = 0, resize: bool = True) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Yield (clip_time, frame) for a video file, resized the same way
+    VideoStreamProcessor.read_frame does (unless resize is False).
+
+    Clip time is frame index / fps, so replays are independent of how fast
+    the machine processes them.
+    """
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or config.TARGET_FPS
+    index = 0
+    try:
+        while not max_frames or index < max_frames:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            if resize and config.FRAME_WIDTH and config.FRAME_HEIGHT:
+                frame = cv2.resize(frame, (config.FRAME_WIDTH, config.FRAME_HEIGHT))
+            yield index / fps, frame
+            index += 1
+    finally:
+        cap.release()
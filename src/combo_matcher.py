@@ -0,0 +1,237 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (kind, name, confidence) - kind is 'gesture' for a single trigger or 'combo'
+MatchEvent = Tuple[str, str, float]
+
+DEFAULT_COMBO_TIMEOUT = 2.0
+
+
+def parse_combos(definitions: List[Dict]) -> List[Dict]:
+    """
+    Validate combo definitions.
+
+    Each definition is {"name": str, "sequence": "A>B>C" or [A, B, C],
+    "timeout": seconds}; timeout is the longest allowed time from the
+    first to the last gesture of the sequence.
+    """
+    combos = []
+    names = set()
+    for definition in definitions:
+        name = str(definition.get('name', '')).strip()
+        sequence = definition.get('sequence', [])
+        if isinstance(sequence, str):
+            sequence = [step.strip().upper() for step in sequence.split('>') if step.strip()]
+        timeout = float(definition.get('timeout') or DEFAULT_COMBO_TIMEOUT)
+
+        if not name or name in names:
+            raise ValueError(f"组合手势名称无效或重复: {name!r}")
+        if len(sequence) < 2:
+            raise ValueError(f"组合手势 {name} 至少需要 2 个手势: {sequence}")
+        if timeout <= 0:
+            raise ValueError(f"组合手势 {name} 超时必须大于 0")
+
+        names.add(name)
+        combos.append({'name': name, 'sequence': list(sequence), 'timeout': timeout})
+    return combos
+
+
+class ComboMatcher:
+    """
+    Matches gesture sequences (combos) on top of GestureBuffer triggers.
+
+    All combos are compiled into one Aho-Corasick automaton with a complete
+    transition table, so each trigger costs a dict lookup no matter how many
+    combos are defined. Timeouts are checked against the timestamps of the
+    last few triggers (bounded by the longest combo).
+
+    Unless emit_single is set, a trigger that starts or continues a combo is
+    held back: it is emitted late if the combo times out or breaks, and
+    swallowed if the combo completes. A completed combo that is itself the
+    prefix of a longer combo is held the same way.
+    """
+
+    def __init__(self, definitions: List[Dict], emit_single: bool = False):
+        self.combos = parse_combos(definitions)
+        self.emit_single = emit_single
+
+        self._compile()
+
+        self.state = 0
+        self.history = deque(maxlen=max(self.depth))  # trigger timestamps
+        self.pending_singles: List[MatchEvent] = []
+        self.pending_combo: Optional[MatchEvent] = None
+
+        logger.info(
+            f"组合手势已启用: {len(self.combos)} 个组合, {len(self.depth)} 个状态 "
+            f"({', '.join(c['name'] + '=' + '>'.join(c['sequence']) for c in self.combos)})"
+        )
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile(self):
+        # Trie
+        goto: List[Dict[str, int]] = [{}]
+        self.depth: List[int] = [0]
+        terminal: List[Optional[int]] = [None]
+        for index, combo in enumerate(self.combos):
+            node = 0
+            for gesture in combo['sequence']:
+                if gesture not in goto[node]:
+                    goto.append({})
+                    self.depth.append(self.depth[node] + 1)
+                    terminal.append(None)
+                    goto[node][gesture] = len(goto) - 1
+                node = goto[node][gesture]
+            if terminal[node] is not None:
+                raise ValueError(f"组合手势序列重复: {combo['name']}")
+            terminal[node] = index
+
+        num_states = len(goto)
+        alphabet = {g for combo in self.combos for g in combo['sequence']}
+
+        # Longest time a partial match ending in each state may stay alive:
+        # the largest timeout of any combo passing through it
+        self.window = [0.0] * num_states
+        for combo in self.combos:
+            node = 0
+            for gesture in combo['sequence']:
+                node = goto[node][gesture]
+                self.window[node] = max(self.window[node], combo['timeout'])
+
+        # Failure links (BFS) and the complete transition table
+        self.fail = [0] * num_states
+        self.delta: List[Dict[str, int]] = [dict() for _ in range(num_states)]
+        self.output: List[Optional[int]] = list(terminal)
+        queue = deque()
+        for gesture in alphabet:
+            child = goto[0].get(gesture)
+            self.delta[0][gesture] = child if child is not None else 0
+            if child is not None:
+                queue.append(child)
+        while queue:
+            node = queue.popleft()
+            if self.output[node] is None:
+                self.output[node] = self.output[self.fail[node]]
+            for gesture in alphabet:
+                child = goto[node].get(gesture)
+                if child is not None:
+                    self.fail[child] = self.delta[self.fail[node]][gesture]
+                    self.delta[node][gesture] = child
+                    queue.append(child)
+                else:
+                    self.delta[node][gesture] = self.delta[self.fail[node]][gesture]
+
+        self.has_children = [bool(children) for children in goto]
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def _started(self, length: int) -> float:
+        return self.history[-length]
+
+    def _flush(self) -> List[MatchEvent]:
+        """Emit everything held back and return to the start state."""
+        events = []
+        if self.pending_combo is not None:
+            events.append(self.pending_combo)
+        events.extend(self.pending_singles)
+        self.pending_combo = None
+        self.pending_singles = []
+        self.state = 0
+        return events
+
+    def interrupt(self) -> List[MatchEvent]:
+        """
+        End any sequence in progress, e.g. when a gesture re-triggers only
+        because it is being held. Returns the events that were held back.
+        """
+        return self._flush()
+
+    def poll(self, now: float) -> List[MatchEvent]:
+        """
+        Release held triggers whose combo can no longer complete in time.
+        Call once per frame.
+        """
+        if self.state and now - self._started(self.depth[self.state]) > self.window[self.state]:
+            if self.pending_combo is None and self.pending_singles:
+                logger.debug(f"组合超时, 释放单手势: {[e[1] for e in self.pending_singles]}")
+            return self._flush()
+        return []
+
+    def feed(self, gesture: str, confidence: float, now: float) -> List[MatchEvent]:
+        """
+        Feed one trigger from GestureBuffer.
+
+        Returns:
+            Events to publish now, in order
+        """
+        events = self.poll(now)
+        event: MatchEvent = ('gesture', gesture, confidence)
+        self.history.append(now)
+
+        node = self.delta[self.state].get(gesture, 0)
+        # Fall back to shorter suffixes while the partial match is too old
+        while node and now - self._started(self.depth[node]) > self.window[node]:
+            node = self.fail[node]
+
+        # A held combo that is not being extended is final
+        if self.pending_combo is not None and self.depth[node] <= self.depth[self.state]:
+            events.append(self.pending_combo)
+            self.pending_combo = None
+            # Held extension attempts are released unless they start the new match
+            keep = self.depth[node] - 1
+            released = self.pending_singles[:-keep] if keep > 0 else self.pending_singles
+            events.extend(released)
+            self.pending_singles = self.pending_singles[len(released):]
+
+        if self.emit_single:
+            events.append(event)
+        else:
+            self.pending_singles.append(event)
+
+        combo_index = self.output[node]
+        if combo_index is not None:
+            combo = self.combos[combo_index]
+            if now - self._started(len(combo['sequence'])) > combo['timeout']:
+                combo_index = None
+
+        if combo_index is not None:
+            combo = self.combos[combo_index]
+            matched: MatchEvent = ('combo', combo['name'], confidence)
+            # Singles before the combo's first gesture were not part of it
+            consumed = len(combo['sequence'])
+            if not self.emit_single and len(self.pending_singles) > consumed:
+                events.extend(self.pending_singles[:-consumed])
+            self.pending_singles = []
+            if self.has_children[node]:
+                self.pending_combo = matched
+                self.state = node
+            else:
+                logger.info(f"✓ 组合手势触发: {combo['name']}")
+                events.append(matched)
+                self.pending_combo = None
+                self.state = 0
+            return events
+
+        if node == 0:
+            events.extend(self._flush())
+            return events
+
+        # Partial match: release held singles that fell out of it
+        keep = self.depth[node]
+        if len(self.pending_singles) > keep:
+            events.extend(self.pending_singles[:-keep])
+            self.pending_singles = self.pending_singles[-keep:]
+        self.state = node
+        return events
+
+    @property
+    def combo_names(self) -> List[str]:
+        return [combo['name'] for combo in self.combos]
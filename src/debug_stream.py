@@ -0,0 +1,259 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+import cv2
+import numpy as np
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = 'gestureframe'
+
+# MediaPipe hand skeleton (landmark index pairs)
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),          # thumb
+    (0, 5), (5, 6), (6, 7), (7, 8),          # index
+    (5, 9), (9, 10), (10, 11), (11, 12),     # middle
+    (9, 13), (13, 14), (14, 15), (15, 16),   # ring
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # pinky and palm
+)
+
+INDEX_PAGE = (
+    '<!doctype html><html><head><meta charset="utf-8"><title>Gesture debug</title></head>'
+    '<body style="margin:0;background:#111"><img src="/stream.mjpg" style="width:100%"></body></html>'
+).encode('utf-8')
+
+# (frame, gesture, confidence, landmarks)
+Job = Tuple[np.ndarray, Optional[str], float, Optional[np.ndarray]]
+
+
+def annotate(frame: np.ndarray, gesture: Optional[str], confidence: float,
+             landmarks: Optional[np.ndarray]) -> np.ndarray:
+    """Draw the hand skeleton and the current gesture on a copy of the frame."""
+    image = frame.copy()
+    height, width = image.shape[:2]
+    scale = max(width, height) / 640.0
+
+    if landmarks is not None:
+        points = np.round(landmarks[:, :2] * (width, height)).astype(np.int32)
+        thickness = max(1, int(round(2 * scale)))
+        for a, b in HAND_CONNECTIONS:
+            cv2.line(image, tuple(points[a]), tuple(points[b]), (0, 255, 0), thickness, cv2.LINE_AA)
+        for point in points:
+            cv2.circle(image, tuple(point), thickness + 1, (0, 0, 255), -1, cv2.LINE_AA)
+
+    label = f"{gesture} {confidence:.2f}" if gesture else 'no hand'
+    font_scale = 0.6 * scale
+    origin = (int(10 * scale), int(28 * scale))
+    cv2.putText(image, label, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0),
+                max(1, int(4 * scale)), cv2.LINE_AA)
+    cv2.putText(image, label, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255),
+                max(1, int(2 * scale)), cv2.LINE_AA)
+    return image
+
+
+class DebugStream:
+    """
+    Annotated view of what the recognizer sees, for tuning camera placement.
+
+    Serves an MJPEG stream over HTTP (GET / or /stream.mjpg) and optionally
+    encodes the frame that caused a trigger for an MQTT camera entity.
+    Drawing and JPEG encoding run on a worker thread. The detection loop
+    only hands over a reference to the latest frame, and only while a
+    client is connected (or for a trigger snapshot). With nobody watching,
+    submit() returns after a single integer check.
+    """
+
+    def __init__(
+        self,
+        host: str = config.DEBUG_STREAM_HOST,
+        port: int = config.DEBUG_STREAM_PORT,
+        fps: float = config.DEBUG_STREAM_FPS,
+        jpeg_quality: int = config.DEBUG_STREAM_JPEG_QUALITY,
+        snapshot_callback: Optional[Callable[[bytes], None]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.snapshot_callback = snapshot_callback
+
+        # Read from the detection thread without locking
+        self.client_count = 0
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+        self._live_job: Optional[Job] = None
+        self._snapshot_job: Optional[Job] = None
+        self._last_submit = 0.0
+
+        # Latest encoded live frame, handed to the client threads
+        self._frame_cond = threading.Condition()
+        self._jpeg: Optional[bytes] = None
+        self._jpeg_seq = 0
+
+    @property
+    def wants_landmarks(self) -> bool:
+        """True if the detection loop should keep landmarks for drawing."""
+        return self.client_count > 0 or self.snapshot_callback is not None
+
+    # ------------------------------------------------------------------
+    # Lifecycle (called from the main thread)
+    # ------------------------------------------------------------------
+
+    def start(self, serve: bool = True) -> bool:
+        """Start the encoder thread and, if serve is set, the HTTP server."""
+        self._worker = threading.Thread(target=self._run, name='debug-encoder', daemon=True)
+        self._worker.start()
+        if not serve:
+            return True
+
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        except OSError as e:
+            logger.error(f"调试画面服务启动失败: {e}")
+            return False
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._server_thread = threading.Thread(target=self.server.serve_forever, name='debug-http', daemon=True)
+        self._server_thread.start()
+        logger.info(f"调试画面服务已启动: http://{self.host}:{self.port}/ (仅在有客户端时编码)")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+        logger.info("调试画面服务已停止")
+
+    # ------------------------------------------------------------------
+    # Detection thread
+    # ------------------------------------------------------------------
+
+    def submit(self, frame: np.ndarray, gesture: Optional[str], confidence: float,
+               landmarks: Optional[np.ndarray]):
+        """Offer the latest processed frame to connected viewers."""
+        if not self.client_count:
+            return
+        now = time.monotonic()
+        if now - self._last_submit < self.interval:
+            return
+        self._last_submit = now
+        with self._lock:
+            self._live_job = (frame, gesture, confidence, landmarks)
+        self._wake.set()
+
+    def snapshot(self, frame: np.ndarray, gesture: str, confidence: float,
+                 landmarks: Optional[np.ndarray]):
+        """Encode the frame that caused a trigger and pass it to snapshot_callback."""
+        if self.snapshot_callback is None:
+            return
+        with self._lock:
+            self._snapshot_job = (frame, gesture, confidence, landmarks)
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Encoder thread
+    # ------------------------------------------------------------------
+
+    def _encode(self, job: Job) -> Optional[bytes]:
+        ok, jpeg = cv2.imencode('.jpg', annotate(*job), self.encode_params)
+        return jpeg.tobytes() if ok else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                live, self._live_job = self._live_job, None
+                snapshot, self._snapshot_job = self._snapshot_job, None
+
+            try:
+                if snapshot is not None:
+                    jpeg = self._encode(snapshot)
+                    if jpeg is not None:
+                        self.snapshot_callback(jpeg)
+                if live is not None and self.client_count:
+                    jpeg = self._encode(live)
+                    if jpeg is not None:
+                        with self._frame_cond:
+                            self._jpeg = jpeg
+                            self._jpeg_seq += 1
+                            self._frame_cond.notify_all()
+            except Exception as e:
+                logger.error(f"调试画面编码出错: {e}")
+
+    # ------------------------------------------------------------------
+    # HTTP client threads
+    # ------------------------------------------------------------------
+
+    def _client_connected(self, peer, delta: int):
+        with self._lock:
+            self.client_count += delta
+            count = self.client_count
+        if delta > 0:
+            logger.info(f"调试画面客户端已连接: {peer} (客户端数: {count})")
+        else:
+            logger.info(f"调试画面客户端已断开: {peer} (客户端数: {count})")
+
+    def _stream(self, handler: BaseHTTPRequestHandler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        handler.send_header('Cache-Control', 'no-cache, private')
+        handler.send_header('Pragma', 'no-cache')
+        handler.end_headers()
+
+        peer = f"{handler.client_address[0]}:{handler.client_address[1]}"
+        self._client_connected(peer, +1)
+        seen = self._jpeg_seq
+        try:
+            while not self._stop.is_set():
+                with self._frame_cond:
+                    self._frame_cond.wait_for(lambda: self._jpeg_seq != seen or self._stop.is_set(), timeout=5)
+                    if self._jpeg_seq == seen:
+                        continue
+                    jpeg, seen = self._jpeg, self._jpeg_seq
+                handler.wfile.write(
+                    f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n'.encode('ascii')
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b'\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self._client_connected(peer, -1)
+
+    def _make_handler(self):
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/stream.mjpg':
+                    stream._stream(self)
+                elif path == '/':
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(INDEX_PAGE)))
+                    self.end_headers()
+                    self.wfile.write(INDEX_PAGE)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                logger.debug(f"调试画面 HTTP: {format % args}")
+
+        return Handler
@@ -0,0 +1,301 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from typing import Optional, Set
+from urllib.parse import parse_qs, urlsplit
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+SSE_KEEPALIVE = 15.0  # seconds between comment lines on an idle SSE stream
+MAX_HEADER_BYTES = 8192
+
+
+class _Client:
+    """One connected consumer with its own bounded queue."""
+
+    def __init__(self, kind: str, frames: bool, queue_size: int, peer):
+        self.kind = kind          # 'sse' or 'websocket'
+        self.frames = frames      # also wants per-frame detection state
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.peer = peer
+        self.task: Optional[asyncio.Task] = None
+
+
+class EventServer:
+    """
+    Embedded asyncio server pushing gesture events to local consumers
+    (wall tablets, media controllers) without an MQTT broker round-trip.
+
+    Endpoints:
+        GET /events[?frames=1]  Server-sent events
+        GET /ws[?frames=1]      WebSocket (text frames, JSON)
+
+    Runs on its own thread alongside MQTT. Each client has a bounded queue;
+    a client that falls behind is disconnected instead of slowing the
+    detection loop. With no clients connected, publish calls return after a
+    single integer check.
+    """
+
+    def __init__(
+        self,
+        host: str = config.EVENT_SERVER_HOST,
+        port: int = config.EVENT_SERVER_PORT,
+        queue_size: int = config.EVENT_SERVER_QUEUE_SIZE
+    ):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+
+        self.clients: Set[_Client] = set()
+        # Read from the detection thread without locking
+        self.client_count = 0
+        self.frame_client_count = 0
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+        self.thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Lifecycle (called from the main thread)
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """Start the server thread. Returns True once it is listening."""
+        self.thread = threading.Thread(target=self._run, name='event-server', daemon=True)
+        self.thread.start()
+        self._ready.wait(timeout=5)
+        return self.server is not None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            logger.info(f"本地事件推送服务已启动: http://{self.host}:{self.port} (/events, /ws)")
+        except OSError as e:
+            logger.error(f"本地事件推送服务启动失败: {e}")
+            self._ready.set()
+            return
+        self._ready.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def stop(self):
+        """Stop the server and disconnect all clients."""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        logger.info("本地事件推送服务已停止")
+
+    # ------------------------------------------------------------------
+    # Publishing (called from the detection thread)
+    # ------------------------------------------------------------------
+
+    def publish_gesture(self, gesture: str, confidence: float, zone: Optional[str] = None):
+        if self.client_count:
+            event = {'type': 'gesture', 'state': gesture,
+                     'confidence': round(confidence, 3), 'timestamp': time.time()}
+            if zone is not None:
+                event['zone'] = zone
+            self._publish(event)
+
+    def publish_combo(self, combo: str, confidence: float, zone: Optional[str] = None):
+        if self.client_count:
+            event = {'type': 'combo', 'event_type': combo,
+                     'confidence': round(confidence, 3), 'timestamp': time.time()}
+            if zone is not None:
+                event['zone'] = zone
+            self._publish(event)
+
+    def publish_frame(self, gesture: Optional[str], confidence: float):
+        """Per-frame detection state, only sent to clients that asked for it."""
+        if self.frame_client_count:
+            self._publish({'type': 'frame', 'gesture': gesture,
+                           'confidence': round(confidence, 3), 'timestamp': time.time()})
+
+    def _publish(self, event: dict):
+        self.loop.call_soon_threadsafe(self._fanout, event, json.dumps(event))
+
+    # ------------------------------------------------------------------
+    # Event loop side
+    # ------------------------------------------------------------------
+
+    def _fanout(self, event: dict, payload: str):
+        is_frame = event['type'] == 'frame'
+        for client in list(self.clients):
+            if is_frame and not client.frames:
+                continue
+            try:
+                client.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(f"事件推送客户端 {client.peer} 处理过慢，已断开")
+                self._remove(client)
+                if client.task:
+                    client.task.cancel()
+
+    def _add(self, client: _Client):
+        self.clients.add(client)
+        self._recount()
+        logger.info(f"事件推送客户端已连接: {client.peer} ({client.kind}, 客户端数: {self.client_count})")
+
+    def _remove(self, client: _Client):
+        if client in self.clients:
+            self.clients.discard(client)
+            self._recount()
+            logger.info(f"事件推送客户端已断开: {client.peer} (客户端数: {self.client_count})")
+
+    def _recount(self):
+        self.client_count = len(self.clients)
+        self.frame_client_count = sum(1 for c in self.clients if c.frames)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        if len(head) > MAX_HEADER_BYTES:
+            writer.close()
+            return
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            writer.close()
+            return
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        frames = parse_qs(url.query).get('frames', ['0'])[0] in ('1', 'true')
+
+        try:
+            if method == 'GET' and url.path == '/events':
+                await self._serve_sse(writer, frames, peer)
+            elif method == 'GET' and url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                await self._serve_websocket(reader, writer, headers, frames, peer)
+            else:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_sse(self, writer: asyncio.StreamWriter, frames: bool, peer):
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Connection: keep-alive\r\n'
+            b'Access-Control-Allow-Origin: *\r\n\r\n'
+        )
+        await writer.drain()
+
+        client = _Client('sse', frames, self.queue_size, peer)
+        client.task = asyncio.current_task()
+        self._add(client)
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(client.queue.get(), timeout=SSE_KEEPALIVE)
+                    writer.write(f'data: {payload}\n\n'.encode('utf-8'))
+                except asyncio.TimeoutError:
+                    writer.write(b': keepalive\n\n')
+                await writer.drain()
+        finally:
+            self._remove(client)
+
+    async def _serve_websocket(self, reader, writer, headers: dict, frames: bool, peer):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest())
+        writer.write(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Upgrade: websocket\r\n'
+            b'Connection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n'
+        )
+        await writer.drain()
+
+        client = _Client('websocket', frames, self.queue_size, peer)
+        client.task = asyncio.current_task()
+        self._add(client)
+        receiver = asyncio.ensure_future(self._websocket_receive(reader, writer))
+        try:
+            while not receiver.done():
+                getter = asyncio.ensure_future(client.queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                writer.write(_ws_frame(0x1, getter.result().encode('utf-8')))
+                await writer.drain()
+        finally:
+            receiver.cancel()
+            self._remove(client)
+
+    async def _websocket_receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle control frames from the client; returns when it closes."""
+        while True:
+            header = await reader.readexactly(2)
+            opcode = header[0] & 0x0F
+            masked = header[1] & 0x80
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await reader.readexactly(8))[0]
+            if length > 65536:
+                return
+            mask = await reader.readexactly(4) if masked else b''
+            data = await reader.readexactly(length)
+            if mask:
+                data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+            if opcode == 0x8:  # close
+                writer.write(_ws_frame(0x8, data[:2]))
+                return
+            if opcode == 0x9:  # ping
+                writer.write(_ws_frame(0xA, data))
+            # Text/binary messages from clients are ignored
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """Encode a single unmasked server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
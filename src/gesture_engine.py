@@ -7,10 +7,14 @@ import cv2
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.components.processors.classifier_options import ClassifierOptions
 import numpy as np
-from typing import Optional, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 import config
 import logging
+from src.landmark_filter import LandmarkSmoother, landmarks_to_array
+from src.template_classifier import TemplateClassifier, normalize_landmarks
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +27,17 @@ class GestureEngine:
     v2.1.0: Switched from Hands to GestureRecognizer for higher accuracy.
     v2.1.2: Switched to IMAGE mode for low latency real-time recognition.
     v2.1.3: Added custom OK gesture detection based on hand landmarks.
+    Landmarks are One Euro smoothed per hand before custom gesture checks.
+    User-trained gestures are matched against recorded landmark templates.
     """
     
-    def __init__(self):
+    def __init__(self, collect_scores: Optional[bool] = None, num_hands: int = config.MAX_NUM_HANDS):
+        """
+        Args:
+            collect_scores: Build the recognizer with every category's score
+                (defaults to GESTURE_TRIGGER_MODE == 'fusion')
+            num_hands: Maximum number of hands detected per frame
+        """
         # Gesture mapping: Google name -> Our name
         self.GESTURE_MAPPING = {
             'Closed_Fist': 'CLOSED_FIST',
@@ -61,37 +73,79 @@ class GestureEngine:
                 f"https://storage.googleapis.com/mediapipe-models/gesture_recognizer/gesture_recognizer/float16/latest/gesture_recognizer.task"
             )
         
+        # Score fusion needs every category's score, not just the top one
+        if collect_scores is None:
+            collect_scores = config.GESTURE_TRIGGER_MODE == 'fusion'
+        self.collect_scores = collect_scores
+        self.last_scores: Optional[Dict[str, float]] = None
+        
+        # Keep the first hand's landmarks of every frame (used by tiled inference)
+        self.keep_landmarks = False
+        self.last_landmarks: Optional[np.ndarray] = None
+        self.last_handedness: Optional[str] = None
+        # Frame the last result belongs to (pipelined engines lag behind the input)
+        self.last_frame: Optional[np.ndarray] = None
+        
+        # Classify every detected hand, not just the first (used by activation zones)
+        self.keep_all_hands = False
+        self.last_hands: List[Dict] = []
+        # Optional (raw landmarks, handedness) -> smoothing key, to keep apart
+        # several hands of the same handedness (activation zones key by zone)
+        self.hand_key: Optional[Callable[[np.ndarray, str], str]] = None
+        
         base_options = python.BaseOptions(model_asset_path=model_path)
         options = vision.GestureRecognizerOptions(
             base_options=base_options,
             running_mode=vision.RunningMode.IMAGE,  # IMAGE mode for low latency
-            num_hands=config.MAX_NUM_HANDS,
+            num_hands=num_hands,
             min_hand_detection_confidence=0.5,       # Google default
             min_hand_presence_confidence=0.5,        # Google default
-            min_tracking_confidence=0.5              # Google default
+            min_tracking_confidence=0.5,             # Google default
+            canned_gesture_classifier_options=ClassifierOptions(max_results=-1) if self.collect_scores else ClassifierOptions()
         )
         self.recognizer = vision.GestureRecognizer.create_from_options(options)
         
+        # Per-hand landmark smoothing to stop threshold gestures chattering
+        self.landmark_filter = LandmarkSmoother() if config.LANDMARK_FILTER_ENABLED else None
+        
+        # User-trained gestures (teach.py); None if no templates were recorded
+        self.template_classifier = TemplateClassifier.load()
+        if self.template_classifier is not None:
+            for name in self.template_classifier.gesture_names:
+                self.GESTURES.setdefault(name, name)
+        
         logger.info(f"MediaPipe Gesture Recognizer 已初始化")
         logger.info(f"运行模式: IMAGE (实时低延迟)")
         logger.info(f"检测阈值: 0.5 (Google 官方默认值)")
         
         # Log enabled gestures
         enabled_list = [self.GESTURES[name] for name, enabled in config.ENABLED_GESTURES.items() if enabled]
+        if self.template_classifier is not None:
+            enabled_list += self.template_classifier.gesture_names
         logger.info(f"启用的手势: {', '.join(enabled_list) if enabled_list else '无'}")
     
-    def process_frame(self, frame: np.ndarray) -> Tuple[Optional[str], float]:
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Tuple[Optional[str], float]:
         """
         Process a single frame and detect hand gesture (IMAGE mode).
         Supports Google's 7 built-in gestures + custom OK gesture.
         
         Args:
             frame: BGR image from OpenCV
+            timestamp: Frame time in seconds for landmark smoothing
+                (defaults to now; pass clip time when replaying files)
             
         Returns:
             Tuple of (gesture_name, confidence)
             gesture_name is None if no hand detected
+            
+        When score collection is on, the full per-gesture score distribution
+        of the frame is left in self.last_scores (None if no hand).
         """
+        self.last_scores = None
+        self.last_landmarks = None
+        self.last_handedness = None
+        self.last_frame = frame
+        self.last_hands = []
         try:
             # Convert BGR to RGB
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -109,38 +163,152 @@ class GestureEngine:
                 logger.debug("未检测到手部")
                 return None, 0.0
             
-            # Get the first hand's gesture
-            gesture = results.gestures[0][0]
-            google_name = gesture.category_name
-            confidence = gesture.score
+            # The first hand is the result; the others only when asked for
+            hands = [self._classify_hand(results, 0, frame, timestamp)]
+            if self.keep_all_hands:
+                hands += [
+                    self._classify_hand(results, index, frame, timestamp)
+                    for index in range(1, len(results.gestures))
+                ]
+                self.last_hands = hands
             
-            # Map to our gesture name
-            our_name = self.GESTURE_MAPPING.get(google_name, 'NONE')
-            
-            # If Google didn't recognize (None/Unknown), check for custom gestures
-            if our_name == 'NONE' and results.hand_landmarks:
-                # Get hand landmarks
-                hand_landmarks = results.hand_landmarks[0]
-                
-                # Check for OK gesture
-                if self._is_ok_sign(hand_landmarks):
-                    our_name = 'OK_SIGN'
-                    confidence = 0.85  # Custom gesture confidence
-                    logger.debug(f"检测到自定义手势: OK_SIGN (置信度: {confidence:.2f})")
-            
-            # Check if gesture is enabled
-            if our_name != 'NONE' and not config.ENABLED_GESTURES.get(our_name, False):
-                logger.debug(f"手势 {our_name} 已检测但未启用")
-                return 'NONE', confidence
-            
-            logger.debug(f"检测到手势: {our_name} (Google: {google_name}, 置信度: {confidence:.2f})")
-            return our_name, confidence
+            hand = hands[0]
+            self.last_scores = hand['scores']
+            self.last_landmarks = hand['landmarks']
+            self.last_handedness = hand['handedness']
+            return hand['gesture'], hand['confidence']
             
         except Exception as e:
             logger.error(f"处理帧时出错: {e}")
             return None, 0.0
     
-    def _is_ok_sign(self, hand_landmarks) -> bool:
+    def _classify_hand(self, results, hand_index: int, frame: np.ndarray,
+                       timestamp: Optional[float]) -> Dict:
+        """
+        Classify one detected hand: built-in gesture, then the custom OK sign
+        and user-trained templates when Google reports None/Unknown.
+        
+        Returns:
+            {'gesture', 'confidence', 'scores', 'landmarks', 'handedness'};
+            landmarks are only extracted when something needs them
+        """
+        category = results.gestures[hand_index][0]
+        google_name = category.category_name
+        confidence = category.score
+        
+        # Map to our gesture name
+        our_name = self.GESTURE_MAPPING.get(google_name, 'NONE')
+        
+        # Get hand landmarks (smoothed per hand if enabled). The filter is
+        # fed every frame so its state stays current between custom checks.
+        hand_landmarks = handedness = None
+        if results.hand_landmarks and len(results.hand_landmarks) > hand_index and (
+            self.landmark_filter is not None or self.keep_landmarks or our_name == 'NONE'
+        ):
+            hand_landmarks = self._landmark_array(results, hand_index, timestamp)
+            handedness = self._handedness(results, hand_index)
+        
+        # If Google didn't recognize (None/Unknown), check for custom gestures
+        if our_name == 'NONE' and hand_landmarks is not None:
+            # Check for OK gesture
+            if self._is_ok_sign(hand_landmarks):
+                our_name = 'OK_SIGN'
+                confidence = 0.85  # Custom gesture confidence
+                logger.debug(f"检测到自定义手势: OK_SIGN (置信度: {confidence:.2f})")
+            
+            # Check user-trained templates
+            elif self.template_classifier is not None:
+                our_name, confidence = self._match_template(hand_landmarks, handedness, frame, confidence)
+        
+        scores = None
+        if self.collect_scores:
+            scores = self._score_distribution(results.gestures[hand_index], our_name, confidence)
+        
+        # Check if gesture is enabled
+        if our_name != 'NONE' and not self._is_enabled(our_name):
+            logger.debug(f"手势 {our_name} 已检测但未启用")
+            our_name = 'NONE'
+        else:
+            logger.debug(f"检测到手势: {our_name} (Google: {google_name}, 置信度: {confidence:.2f})")
+        
+        return {
+            'gesture': our_name,
+            'confidence': confidence,
+            'scores': scores,
+            'landmarks': hand_landmarks,
+            'handedness': handedness,
+        }
+    
+    def _score_distribution(self, categories, our_name: str, confidence: float) -> Dict[str, float]:
+        """
+        Map one hand's category list to our gesture names.
+        Disabled gestures and Google's None/Unknown fold into 'NONE'; a custom
+        gesture found on this frame takes its confidence out of 'NONE'.
+        """
+        scores: Dict[str, float] = {}
+        for category in categories:
+            name = self.GESTURE_MAPPING.get(category.category_name, 'NONE')
+            if name != 'NONE' and not self._is_enabled(name):
+                name = 'NONE'
+            scores[name] = scores.get(name, 0.0) + category.score
+        
+        if our_name not in scores and self._is_enabled(our_name):
+            scores[our_name] = confidence
+            scores['NONE'] = max(0.0, scores.get('NONE', 0.0) - confidence)
+        return scores
+    
+    def _is_enabled(self, name: str) -> bool:
+        """Built-in toggles from config; user-trained templates are always enabled."""
+        if config.ENABLED_GESTURES.get(name, False):
+            return True
+        return self.template_classifier is not None and name in self.template_classifier.label_set
+    
+    @staticmethod
+    def _handedness(results, hand_index: int) -> Optional[str]:
+        """'Left' / 'Right' for a detected hand, None if unknown."""
+        if results.handedness and len(results.handedness) > hand_index:
+            return results.handedness[hand_index][0].category_name
+        return None
+    
+    def _match_template(self, hand_landmarks: np.ndarray, handedness: Optional[str],
+                        frame: np.ndarray, confidence: float) -> Tuple[str, float]:
+        """
+        Nearest-neighbour match of the hand against user-trained templates.
+        Left hands are mirrored so a template recorded with one hand serves both.
+        
+        Returns:
+            (gesture_name, confidence), ('NONE', confidence) if nothing matches
+        """
+        height, width = frame.shape[:2]
+        embedding = normalize_landmarks(
+            hand_landmarks,
+            aspect=width / height,
+            mirror=handedness == 'Left'
+        )
+        label, distance = self.template_classifier.classify(embedding)
+        if label is None:
+            return 'NONE', confidence
+        
+        logger.debug(f"检测到自定义模板手势: {label} (距离: {distance:.3f})")
+        return label, self.template_classifier.confidence(distance)
+    
+    def _landmark_array(self, results, hand_index: int, timestamp: Optional[float]) -> np.ndarray:
+        """
+        Return the (21, 3) landmark array for one hand, One Euro filtered
+        with that hand's own state when smoothing is enabled.
+        """
+        landmarks = landmarks_to_array(results.hand_landmarks[hand_index])
+        if self.landmark_filter is None:
+            return landmarks
+        
+        hand_key = self._handedness(results, hand_index) or str(hand_index)
+        if self.hand_key is not None:
+            hand_key = self.hand_key(landmarks, hand_key)
+        if timestamp is None:
+            timestamp = time.monotonic()
+        return self.landmark_filter.smooth(hand_key, landmarks, timestamp)
+    
+    def _is_ok_sign(self, hand_landmarks: np.ndarray) -> bool:
         """
         Detect OK sign: thumb tip and index tip are close together,
         while other three fingers (middle, ring, pinky) are extended.
@@ -152,7 +320,7 @@ class GestureEngine:
         - Pinky (landmark 20) extended
         
         Args:
-            hand_landmarks: Hand landmarks from MediaPipe (list of 21 landmarks)
+            hand_landmarks: Hand landmark array, shape (21, 3) as (x, y, z)
         
         Returns:
             True if OK gesture detected, False otherwise
@@ -173,17 +341,17 @@ class GestureEngine:
         # Middle finger
         middle_tip = landmarks[12]
         middle_pip = landmarks[10]
-        middle_extended = middle_tip.y < middle_pip.y  # Y increases downward
+        middle_extended = middle_tip[1] < middle_pip[1]  # Y increases downward
         
         # Ring finger
         ring_tip = landmarks[16]
         ring_pip = landmarks[14]
-        ring_extended = ring_tip.y < ring_pip.y
+        ring_extended = ring_tip[1] < ring_pip[1]
         
         # Pinky
         pinky_tip = landmarks[20]
         pinky_pip = landmarks[18]
-        pinky_extended = pinky_tip.y < pinky_pip.y
+        pinky_extended = pinky_tip[1] < pinky_pip[1]
         
         # OK sign: tips close + other three fingers extended
         return middle_extended and ring_extended and pinky_extended
@@ -195,17 +363,13 @@ class GestureEngine:
         Uses 3D coordinates (x, y, z).
         
         Args:
-            point1: First landmark point
-            point2: Second landmark point
+            point1: First landmark point as (x, y, z)
+            point2: Second landmark point as (x, y, z)
         
         Returns:
             Euclidean distance between the two points
         """
-        return np.sqrt(
-            (point1.x - point2.x) ** 2 +
-            (point1.y - point2.y) ** 2 +
-            (point1.z - point2.z) ** 2
-        )
+        return float(np.linalg.norm(point1 - point2))
     
     def release(self):
         """Clean up resources."""
@@ -0,0 +1,113 @@
+import numpy as np
+from typing import Dict, Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al. 2012) vectorized over a whole landmark array.
+
+    Every element of the array is filtered independently, but all 21x3 values
+    are updated with a handful of numpy operations per frame. The cutoff
+    adapts to speed: slow jitter is smoothed heavily (min_cutoff), fast real
+    movement passes through with little lag (beta).
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.5, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+        self.x_prev: Optional[np.ndarray] = None
+        self.dx_prev: Optional[np.ndarray] = None
+        self.t_prev: float = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt: float):
+        tau = 1.0 / (2.0 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+
+    def __call__(self, x: np.ndarray, timestamp: float) -> np.ndarray:
+        if self.x_prev is None or x.shape != self.x_prev.shape:
+            self.x_prev = x.copy()
+            self.dx_prev = np.zeros_like(x)
+            self.t_prev = timestamp
+            return x
+
+        dt = timestamp - self.t_prev
+        if dt <= 0:
+            return self.x_prev
+
+        # Smoothed derivative drives the adaptive cutoff
+        dx = (x - self.x_prev) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        dx_hat = a_d * dx + (1.0 - a_d) * self.dx_prev
+
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        a = self._alpha(cutoff, dt)
+        x_hat = a * x + (1.0 - a) * self.x_prev
+
+        self.x_prev = x_hat
+        self.dx_prev = dx_hat
+        self.t_prev = timestamp
+        return x_hat
+
+
+class LandmarkSmoother:
+    """
+    Keeps one OneEuroFilter per hand (keyed by handedness) and resets a
+    hand's state when it has not been seen for longer than reset_after
+    seconds, so a hand re-entering the frame does not drag old positions in.
+    """
+
+    def __init__(
+        self,
+        min_cutoff: float = config.LANDMARK_FILTER_MIN_CUTOFF,
+        beta: float = config.LANDMARK_FILTER_BETA,
+        d_cutoff: float = config.LANDMARK_FILTER_D_CUTOFF,
+        reset_after: float = 0.5
+    ):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset_after = reset_after
+        self.filters: Dict[str, OneEuroFilter] = {}
+
+        logger.info(f"关键点平滑已启用 (One Euro: min_cutoff={min_cutoff}, beta={beta})")
+
+    def smooth(self, hand_key: str, landmarks: np.ndarray, timestamp: float) -> np.ndarray:
+        """
+        Filter a (21, 3) landmark array for the given hand.
+
+        Args:
+            hand_key: Stable per-hand key (e.g. "Left" / "Right")
+            landmarks: Normalized landmark coordinates, shape (21, 3)
+            timestamp: Frame time in seconds
+
+        Returns:
+            Smoothed landmark array with the same shape
+        """
+        hand_filter = self.filters.get(hand_key)
+        if hand_filter is None:
+            hand_filter = OneEuroFilter(self.min_cutoff, self.beta, self.d_cutoff)
+            self.filters[hand_key] = hand_filter
+        elif timestamp - hand_filter.t_prev > self.reset_after:
+            hand_filter.reset()
+
+        return hand_filter(landmarks, timestamp)
+
+    def reset(self):
+        """Forget all hands (e.g. after a frame with no hands)."""
+        self.filters.clear()
+
+
+def landmarks_to_array(hand_landmarks) -> np.ndarray:
+    """Convert MediaPipe NormalizedLandmark list to a (21, 3) float array."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks], dtype=np.float64)
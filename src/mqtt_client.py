@@ -2,6 +2,7 @@ import paho.mqtt.client as mqtt
 import json
 import time
 import logging
+from typing import Callable, Optional
 import config
 
 logger = logging.getLogger(__name__)
@@ -25,6 +26,19 @@ class MQTTClient:
         
         self.connected = False
         self.discovery_sent = False
+        
+        # Combo names to announce as event types (set before connect)
+        self.combo_names = []
+        
+        # Activation zones published as their own sensors (set before connect)
+        self.zone_entities = []
+        
+        # Announce an MQTT camera for trigger snapshots (set before connect)
+        self.snapshot_enabled = False
+        
+        # Called with the requested duration when a profiling command arrives
+        self.on_profile_request: Optional[Callable[[float], None]] = None
+        self.client.message_callback_add(config.MQTT_PROFILE_TOPIC, self._on_profile_message)
     
     def connect(self) -> bool:
         """
@@ -54,6 +68,8 @@ class MQTTClient:
         if rc == 0:
             logger.info("成功连接到 MQTT broker")
             self.connected = True
+            if self.on_profile_request is not None:
+                self.client.subscribe(config.MQTT_PROFILE_TOPIC, qos=0)
             # Send Home Assistant discovery config
             self._send_discovery_config()
         else:
@@ -104,6 +120,118 @@ class MQTTClient:
             self.discovery_sent = True
         else:
             logger.error(f"发送自动发现配置失败: {result.rc}")
+        
+        if self.combo_names:
+            self._send_combo_discovery_config(discovery_payload["device"])
+        for zone in self.zone_entities:
+            self._send_zone_discovery_config(zone, discovery_payload["device"])
+        if self.on_profile_request is not None:
+            self._send_profile_discovery_config(discovery_payload["device"])
+        if self.snapshot_enabled:
+            self._send_snapshot_discovery_config(discovery_payload["device"])
+    
+    def _send_combo_discovery_config(self, device: dict):
+        """
+        Send discovery for an MQTT event entity carrying all gesture combos,
+        one event type per combo name.
+        """
+        discovery_topic = f"{config.MQTT_DISCOVERY_PREFIX}/event/gesture_control_combo/config"
+        discovery_payload = {
+            "name": "组合手势",
+            "unique_id": "gesture_control_combo",
+            "state_topic": config.MQTT_COMBO_TOPIC,
+            "event_types": self.combo_names,
+            "icon": "mdi:gesture-double-tap",
+            "device": device
+        }
+        result = self.client.publish(
+            discovery_topic,
+            json.dumps(discovery_payload),
+            qos=1,
+            retain=True
+        )
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.info(f"组合手势事件自动发现配置已发送到 {discovery_topic}")
+        else:
+            logger.error(f"发送组合手势自动发现配置失败: {result.rc}")
+    
+    def _send_zone_discovery_config(self, zone: str, device: dict):
+        """Send discovery for the gesture sensor of one activation zone."""
+        discovery_topic = f"{config.MQTT_DISCOVERY_PREFIX}/sensor/gesture_control_zone_{zone}/config"
+        state_topic = f"{config.MQTT_ZONE_TOPIC_PREFIX}/{zone}/state"
+        discovery_payload = {
+            "name": f"手势控制 ({zone})",
+            "unique_id": f"gesture_control_zone_{zone}",
+            "state_topic": state_topic,
+            "value_template": "{{ value_json.state }}",
+            "json_attributes_topic": state_topic,
+            "icon": "mdi:hand-back-right",
+            "device": device
+        }
+        result = self.client.publish(
+            discovery_topic,
+            json.dumps(discovery_payload),
+            qos=1,
+            retain=True
+        )
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.info(f"区域 {zone} 手势传感器自动发现配置已发送到 {discovery_topic}")
+        else:
+            logger.error(f"发送区域 {zone} 自动发现配置失败: {result.rc}")
+    
+    def _send_profile_discovery_config(self, device: dict):
+        """Send discovery for a button that starts a profiling capture."""
+        discovery_topic = f"{config.MQTT_DISCOVERY_PREFIX}/button/gesture_control_profile/config"
+        discovery_payload = {
+            "name": "性能分析",
+            "unique_id": "gesture_control_profile",
+            "command_topic": config.MQTT_PROFILE_TOPIC,
+            "payload_press": str(config.PROFILE_DURATION),
+            "entity_category": "diagnostic",
+            "icon": "mdi:speedometer",
+            "device": device
+        }
+        result = self.client.publish(
+            discovery_topic,
+            json.dumps(discovery_payload),
+            qos=1,
+            retain=True
+        )
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.error(f"发送性能分析按钮自动发现配置失败: {result.rc}")
+    
+    def _send_snapshot_discovery_config(self, device: dict):
+        """Send discovery for a camera showing the frame of the last trigger."""
+        discovery_topic = f"{config.MQTT_DISCOVERY_PREFIX}/camera/gesture_control_snapshot/config"
+        discovery_payload = {
+            "name": "触发快照",
+            "unique_id": "gesture_control_snapshot",
+            "topic": config.MQTT_SNAPSHOT_TOPIC,
+            "icon": "mdi:camera-image",
+            "device": device
+        }
+        result = self.client.publish(
+            discovery_topic,
+            json.dumps(discovery_payload),
+            qos=1,
+            retain=True
+        )
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.info(f"触发快照摄像头自动发现配置已发送到 {discovery_topic}")
+        else:
+            logger.error(f"发送触发快照自动发现配置失败: {result.rc}")
+    
+    def _on_profile_message(self, client, userdata, message):
+        """Callback for profiling commands; payload is the duration in seconds."""
+        if self.on_profile_request is None:
+            return
+        text = message.payload.decode('utf-8', errors='ignore').strip()
+        try:
+            duration = float(text) if text else config.PROFILE_DURATION
+        except ValueError:
+            logger.warning(f"无效的性能分析命令: {text!r}")
+            return
+        self.on_profile_request(duration)
     
     def publish_gesture(self, gesture: str, confidence: float):
         """
@@ -135,6 +263,85 @@ class MQTTClient:
         else:
             logger.error(f"发布手势失败: {result.rc}")
     
+    def publish_zone_gesture(self, zone: str, gesture: str, confidence: float):
+        """
+        Publish gesture state to an activation zone's own sensor.
+        
+        Args:
+            zone: Activation zone name
+            gesture: Gesture name (e.g., "OPEN_PALM", "THUMBS_UP")
+            confidence: Detection confidence (0.0 to 1.0)
+        """
+        if not self.connected:
+            logger.warning("未连接到 MQTT broker，跳过发布")
+            return
+        
+        payload = {
+            "state": gesture,
+            "zone": zone,
+            "confidence": round(confidence, 3),
+            "timestamp": time.time()
+        }
+        
+        result = self.client.publish(
+            f"{config.MQTT_ZONE_TOPIC_PREFIX}/{zone}/state",
+            json.dumps(payload),
+            qos=1,
+            retain=False
+        )
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.debug(f"已发布区域 {zone} 手势: {gesture} (置信度: {confidence:.2f})")
+        else:
+            logger.error(f"发布区域手势失败: {result.rc}")
+    
+    def publish_combo(self, combo: str, confidence: float, zone: Optional[str] = None):
+        """
+        Publish a completed gesture combo as an MQTT event.
+        
+        Args:
+            combo: Combo name from the combo definitions
+            confidence: Confidence of the combo's last gesture
+            zone: Activation zone the combo was made in (entity zones only)
+        """
+        if not self.connected:
+            logger.warning("未连接到 MQTT broker，跳过发布")
+            return
+        
+        payload = {
+            "event_type": combo,
+            "confidence": round(confidence, 3),
+            "timestamp": time.time()
+        }
+        if zone is not None:
+            payload["zone"] = zone
+        
+        result = self.client.publish(
+            config.MQTT_COMBO_TOPIC,
+            json.dumps(payload),
+            qos=1,
+            retain=False
+        )
+        
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.debug(f"已发布组合手势: {combo}")
+        else:
+            logger.error(f"发布组合手势失败: {result.rc}")
+    
+    def publish_snapshot(self, jpeg: bytes):
+        """
+        Publish the JPEG of the frame that caused the last trigger
+        (retained, so the camera entity shows it after a restart).
+        """
+        if not self.connected:
+            return
+        
+        result = self.client.publish(config.MQTT_SNAPSHOT_TOPIC, jpeg, qos=0, retain=True)
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            logger.debug(f"已发布触发快照 ({len(jpeg) // 1024} KB)")
+        else:
+            logger.error(f"发布触发快照失败: {result.rc}")
+    
     def disconnect(self):
         """Disconnect from MQTT broker and clean up."""
         logger.info("断开 MQTT broker 连接")
@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Functions whose share of samples is reported after every capture
+HOT_FUNCTIONS = ('main', 'process_frame', 'read_frame', 'add_detection')
+
+
+class SamplingProfiler:
+    """
+    On-demand statistical profiler for the detection loop.
+
+    A capture is started at runtime (SIGUSR1 or MQTT command) and samples the
+    stack of the detection thread from a helper thread at a fixed interval,
+    so the profiled code itself runs unmodified. Stacks are written in the
+    folded format understood by flamegraph.pl, speedscope and inferno.
+
+    Nothing runs while no capture is active, and every capture is capped at
+    max_duration seconds.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = config.PROFILE_OUTPUT_DIR,
+        interval: float = config.PROFILE_INTERVAL_MS / 1000.0,
+        max_duration: float = config.PROFILE_MAX_DURATION,
+        keep: int = config.PROFILE_KEEP
+    ):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.max_duration = max_duration
+        self.keep = keep
+
+        self.target_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def attach(self, thread_id: Optional[int] = None):
+        """Select the thread to sample (defaults to the calling thread)."""
+        self.target_thread_id = thread_id or threading.get_ident()
+
+    def start(self, duration: float = config.PROFILE_DURATION) -> bool:
+        """
+        Start a time-boxed capture. Safe to call from a signal handler or an
+        MQTT callback; ignored if a capture is already running.
+        """
+        if self.running:
+            logger.warning("性能分析已在进行中，忽略新的请求")
+            return False
+        if self.target_thread_id is None:
+            logger.error("性能分析未绑定检测线程")
+            return False
+
+        duration = max(0.1, min(float(duration), self.max_duration))
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name='profiler', daemon=True
+        )
+        self._thread.start()
+        logger.info(f"性能分析已开始: {duration:.1f}s, 采样间隔 {self.interval * 1000:.0f}ms")
+        return True
+
+    def stop(self):
+        """End the current capture early (the partial profile is still written)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self, duration: float):
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + duration
+
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                logger.warning("检测线程已退出，结束性能分析")
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stacks[';'.join(reversed(stack))] += 1
+            samples += 1
+            self._stop.wait(self.interval)
+
+        elapsed = time.monotonic() - started
+        self._write(stacks, samples, elapsed)
+
+    def _write(self, stacks: Counter, samples: int, elapsed: float):
+        if not samples:
+            logger.warning("性能分析未采集到样本")
+            return
+
+        path = os.path.join(self.output_dir, time.strftime('profile-%Y%m%d-%H%M%S.folded'))
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self._prune()
+        except OSError as e:
+            logger.error(f"写入性能分析结果失败: {e}")
+            return
+
+        # Share of samples spent inside the loop's hot functions
+        shares = []
+        for name in HOT_FUNCTIONS:
+            hits = sum(count for stack, count in stacks.items() if f';{name} (' in ';' + stack)
+            shares.append(f"{name}={hits / samples:.0%}")
+        logger.info(
+            f"性能分析完成: {samples} 个样本 / {elapsed:.1f}s, 结果已写入 {path} "
+            f"({', '.join(shares)})"
+        )
+
+    def _prune(self):
+        """Keep only the newest `keep` profiles."""
+        profiles = sorted(
+            name for name in os.listdir(self.output_dir)
+            if name.startswith('profile-') and name.endswith('.folded')
+        )
+        for name in profiles[:-self.keep] if self.keep > 0 else []:
+            os.remove(os.path.join(self.output_dir, name))
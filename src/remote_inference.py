@@ -0,0 +1,517 @@
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# Wire protocol
+#
+# Every message is a fixed header followed by `length` payload bytes:
+#     magic  2s   b'GW'
+#     type   B    MSG_*
+#     seq    I    frame sequence number (0 for HELLO)
+#     length I    payload size
+#
+# HELLO  worker -> node  JSON {"protocol": 1, "worker": hostname}, once the
+#                        worker's recognizer is ready
+# FRAME  node -> worker  !dB (timestamp, flags) + JPEG bytes
+# RESULT worker -> node  JSON {"gesture", "confidence", "scores", "landmarks",
+#                        "handedness", "error"}
+#
+# Frames are pipelined: the node does not wait for a RESULT before sending
+# the next FRAME, and results are matched back by sequence number.
+# ============================================================================
+
+PROTOCOL_VERSION = 1
+MAGIC = b'GW'
+HEADER = struct.Struct('!2sBII')
+FRAME_PREFIX = struct.Struct('!dB')
+MAX_PAYLOAD = 16 * 1024 * 1024
+
+MSG_HELLO = 1
+MSG_FRAME = 2
+MSG_RESULT = 3
+
+FLAG_SCORES = 0x01
+FLAG_LANDMARKS = 0x02
+
+RECONNECT_INTERVAL = 5.0  # seconds between attempts to reach lost workers
+HANDSHAKE_TIMEOUT = 10.0  # minimum wait for HELLO; workers load the model first
+
+# (gesture, confidence, scores, landmarks, handedness)
+Result = Tuple[Optional[str], float, Optional[Dict[str, float]], Optional[np.ndarray], Optional[str]]
+NO_HAND: Result = (None, 0.0, None, None, None)
+
+
+def parse_workers(workers: List[str], default_port: int = config.INFERENCE_WORKER_PORT) -> List[Tuple[str, int]]:
+    """Parse 'host[:port]' strings."""
+    addresses = []
+    for worker in workers:
+        host, _, port = worker.strip().partition(':')
+        try:
+            addresses.append((host, int(port) if port else default_port))
+        except ValueError:
+            raise ValueError(f"无效的推理节点地址: {worker!r} (格式: 主机:端口)")
+    return addresses
+
+
+def send_message(sock: socket.socket, msg_type: int, seq: int, payload: bytes):
+    sock.sendall(HEADER.pack(MAGIC, msg_type, seq, len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Tuple[int, int, bytes]:
+    magic, msg_type, seq, length = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if magic != MAGIC or length > MAX_PAYLOAD:
+        raise ConnectionError(f"invalid message header (magic={magic!r}, length={length})")
+    return msg_type, seq, _recv_exactly(sock, length)
+
+
+# ============================================================================
+# Worker side
+# ============================================================================
+
+class InferenceWorker:
+    """
+    TCP server wrapping GestureEngine for remote inference.
+
+    Each connected node gets its own thread and its own GestureEngine, so
+    landmark smoothing state follows that node's stream. Frames on a
+    connection are processed in order and answered with their sequence
+    number; pipelined frames wait in the socket buffer meanwhile.
+
+    Gesture toggles, templates and filter settings come from the worker's
+    own environment. The recognizer is always built with every category's
+    score, so nodes in fusion mode get the full distribution regardless of
+    the worker's GESTURE_TRIGGER_MODE.
+    """
+
+    def __init__(
+        self,
+        host: str = '0.0.0.0',
+        port: int = config.INFERENCE_WORKER_PORT,
+        engine_factory: Optional[Callable] = None
+    ):
+        self.host = host
+        self.port = port
+        if engine_factory is None:
+            from src.gesture_engine import GestureEngine
+            engine_factory = lambda: GestureEngine(collect_scores=True)
+        self.engine_factory = engine_factory
+
+        self.sock: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._connections: List[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Bind and listen (port 0 picks a free port, see self.port)."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        logger.info(f"推理节点已启动: {self.host}:{self.port}")
+
+    def serve_forever(self):
+        if self.sock is None:
+            self.start()
+        while not self._stop.is_set():
+            try:
+                conn, peer = self.sock.accept()
+            except OSError:
+                break
+            if self._stop.is_set():
+                conn.close()
+                break
+            threading.Thread(
+                target=self._serve, args=(conn, peer), name=f'worker-{peer[0]}:{peer[1]}', daemon=True
+            ).start()
+
+    def stop(self):
+        self._stop.set()
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)  # wakes up accept()
+            except OSError:
+                pass
+            self.sock.close()
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        logger.info("推理节点已停止")
+
+    def _serve(self, conn: socket.socket, peer):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self._connections.append(conn)
+        engine = None
+        frames = 0
+        try:
+            engine = self.engine_factory()
+            hello = {'protocol': PROTOCOL_VERSION, 'worker': socket.gethostname()}
+            send_message(conn, MSG_HELLO, 0, json.dumps(hello).encode('utf-8'))
+            logger.info(f"采集节点已连接: {peer[0]}:{peer[1]}")
+
+            while not self._stop.is_set():
+                msg_type, seq, payload = recv_message(conn)
+                if msg_type != MSG_FRAME:
+                    continue
+                result = self._infer(engine, payload)
+                send_message(conn, MSG_RESULT, seq, json.dumps(result).encode('utf-8'))
+                frames += 1
+        except (ConnectionError, OSError, struct.error):
+            pass
+        except Exception as e:
+            logger.error(f"推理节点处理出错 ({peer[0]}:{peer[1]}): {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._connections.remove(conn)
+            conn.close()
+            if engine is not None:
+                engine.release()
+            logger.info(f"采集节点已断开: {peer[0]}:{peer[1]} (已处理 {frames} 帧)")
+
+    @staticmethod
+    def _infer(engine, payload: bytes) -> Dict:
+        timestamp, flags = FRAME_PREFIX.unpack_from(payload)
+        frame = cv2.imdecode(np.frombuffer(payload, np.uint8, offset=FRAME_PREFIX.size), cv2.IMREAD_COLOR)
+        if frame is None:
+            return {'gesture': None, 'confidence': 0.0, 'error': 'undecodable frame'}
+
+        # Only toggles what is returned; the recognizer already scores every category
+        engine.collect_scores = bool(flags & FLAG_SCORES)
+        engine.keep_landmarks = bool(flags & FLAG_LANDMARKS)
+        gesture, confidence = engine.process_frame(frame, timestamp)
+        result = {'gesture': gesture, 'confidence': float(confidence), 'scores': engine.last_scores}
+        if engine.keep_landmarks and engine.last_landmarks is not None:
+            result['landmarks'] = np.round(engine.last_landmarks, 5).tolist()
+            result['handedness'] = engine.last_handedness
+        return result
+
+
+# ============================================================================
+# Node side
+# ============================================================================
+
+class _WorkerConnection:
+    """Client end of one worker connection, with its receiver thread."""
+
+    def __init__(self, address: Tuple[str, int], on_result: Callable, on_lost: Callable):
+        self.address = address
+        self.name = f"{address[0]}:{address[1]}"
+        self.sock: Optional[socket.socket] = None
+        self.connected = False
+        self.generation = 0  # bumped on every (re)connect
+        self.in_flight = 0
+        self._send_lock = threading.Lock()
+        self._on_result = on_result
+        self._on_lost = on_lost
+
+    def connect(self, timeout: float) -> bool:
+        sock = None
+        try:
+            sock = socket.create_connection(self.address, timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            msg_type, _, payload = recv_message(sock)
+            hello = json.loads(payload)
+            if msg_type != MSG_HELLO or hello.get('protocol') != PROTOCOL_VERSION:
+                logger.error(f"推理节点 {self.name} 协议不兼容: {hello}")
+                sock.close()
+                return False
+            sock.settimeout(None)
+        except (OSError, ConnectionError, ValueError, struct.error) as e:
+            logger.debug(f"连接推理节点 {self.name} 失败: {e}")
+            if sock is not None:
+                sock.close()
+            return False
+
+        self.sock = sock
+        self.in_flight = 0
+        self.generation += 1
+        self.connected = True
+        threading.Thread(target=self._receive, args=(sock,), name=f'remote-{self.name}', daemon=True).start()
+        logger.info(f"✓ 已连接推理节点: {self.name} ({hello.get('worker')})")
+        return True
+
+    def alive(self, generation: int) -> bool:
+        """True while the connection a frame was sent on is still up."""
+        return self.connected and self.generation == generation
+
+    def send(self, seq: int, payload: bytes) -> bool:
+        try:
+            with self._send_lock:
+                send_message(self.sock, MSG_FRAME, seq, payload)
+            return True
+        except OSError as e:
+            logger.warning(f"发送到推理节点 {self.name} 失败: {e}")
+            self.close()
+            return False
+
+    def close(self):
+        if not self.connected:
+            return
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self._on_lost(self)
+
+    def _receive(self, sock: socket.socket):
+        try:
+            while True:
+                msg_type, seq, payload = recv_message(sock)
+                if msg_type == MSG_RESULT:
+                    self._on_result(self, seq, json.loads(payload))
+        except (OSError, ConnectionError, ValueError, struct.error):
+            pass
+        if self.sock is sock and self.connected:
+            logger.warning(f"推理节点 {self.name} 已断开")
+            self.close()
+
+
+class _Pending:
+    """A frame sent to a worker whose result has not been returned yet."""
+    __slots__ = ('seq', 'frame', 'timestamp', 'conn', 'generation', 'sent_at', 'result')
+
+    def __init__(self, seq: int, frame: np.ndarray, timestamp: float, conn: _WorkerConnection):
+        self.seq = seq
+        self.frame = frame
+        self.timestamp = timestamp
+        self.conn = conn
+        self.generation = conn.generation
+        self.sent_at = time.monotonic()
+        self.result: Optional[Result] = None
+
+
+class RemoteGestureEngine:
+    """
+    Sends frames to remote inference workers (inference_worker.py) instead
+    of recognizing them locally.
+
+    Frames (already downscaled to FRAME_WIDTH x FRAME_HEIGHT by the stream
+    processor) are JPEG-compressed and pipelined: process_frame() sends the
+    current frame and returns the result of the frame sent `max_in_flight`
+    calls earlier, so inference on the workers overlaps capture on this node.
+    Results always come back in frame order. With max_in_flight=0 each call
+    waits for its own result.
+
+    Each frame goes to the connected worker with the fewest outstanding
+    frames. A frame whose worker disconnects or does not answer within
+    `timeout` is recognized locally; with no worker reachable every frame
+    is recognized locally until a worker comes back (retried in the
+    background every few seconds).
+
+    Exposes the same process_frame / last_scores / release interface as
+    GestureEngine.
+    """
+
+    def __init__(
+        self,
+        workers: List[str] = config.REMOTE_INFERENCE_WORKERS,
+        max_in_flight: int = config.REMOTE_INFERENCE_MAX_IN_FLIGHT,
+        timeout: float = config.REMOTE_INFERENCE_TIMEOUT,
+        jpeg_quality: int = config.REMOTE_INFERENCE_JPEG_QUALITY,
+        local_engine_factory: Optional[Callable] = None
+    ):
+        self.max_in_flight = max(0, max_in_flight)
+        self.timeout = timeout
+        self.connect_timeout = max(timeout, HANDSHAKE_TIMEOUT)
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        if local_engine_factory is None:
+            from src.gesture_engine import GestureEngine
+            local_engine_factory = GestureEngine
+        self.local_engine_factory = local_engine_factory
+        self.local_engine = None
+
+        self.collect_scores = config.GESTURE_TRIGGER_MODE == 'fusion'
+        self.keep_landmarks = False
+        self.last_scores: Optional[Dict[str, float]] = None
+        self.last_landmarks: Optional[np.ndarray] = None
+        self.last_handedness: Optional[str] = None
+        # Frame the last result belongs to, max_in_flight calls behind the input
+        self.last_frame: Optional[np.ndarray] = None
+
+        self.stats = {'remote': 0, 'local': 0, 'timeouts': 0}
+
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._pending: Deque[_Pending] = deque()
+        self._by_seq: Dict[int, _Pending] = {}
+
+        self.connections = [
+            _WorkerConnection(address, self._on_result, self._on_lost)
+            for address in parse_workers(workers)
+        ]
+        for conn in self.connections:
+            conn.connect(timeout=self.connect_timeout)
+        if not any(conn.connected for conn in self.connections):
+            logger.warning("暂无可用推理节点，使用本地推理")
+
+        self._stop = threading.Event()
+        self._reconnector = threading.Thread(target=self._reconnect_loop, name='remote-reconnect', daemon=True)
+        self._reconnector.start()
+
+        logger.info(
+            f"远程推理已启用: {len(self.connections)} 个节点, 流水线深度 {self.max_in_flight}, "
+            f"超时 {timeout}s, JPEG 质量 {jpeg_quality}"
+        )
+
+    # ------------------------------------------------------------------
+    # Receiver / reconnect threads
+    # ------------------------------------------------------------------
+
+    def _on_result(self, conn: _WorkerConnection, seq: int, message: Dict):
+        landmarks = message.get('landmarks')
+        result: Result = (
+            message.get('gesture'),
+            float(message.get('confidence', 0.0)),
+            message.get('scores'),
+            np.asarray(landmarks, dtype=np.float64) if landmarks is not None else None,
+            message.get('handedness'),
+        )
+        if message.get('error'):
+            logger.debug(f"推理节点 {conn.name} 返回错误: {message['error']}")
+        with self._cond:
+            entry = self._by_seq.get(seq)
+            if entry is not None and entry.conn is conn and entry.generation == conn.generation \
+                    and entry.result is None:
+                entry.result = result
+                conn.in_flight -= 1
+                self._cond.notify_all()
+
+    def _on_lost(self, conn: _WorkerConnection):
+        with self._cond:
+            conn.in_flight = 0
+            self._cond.notify_all()
+
+    def _reconnect_loop(self):
+        while not self._stop.wait(RECONNECT_INTERVAL):
+            for conn in self.connections:
+                if not conn.connected and not self._stop.is_set():
+                    conn.connect(timeout=self.connect_timeout)
+
+    # ------------------------------------------------------------------
+    # Detection thread
+    # ------------------------------------------------------------------
+
+    def _pick(self) -> Optional[_WorkerConnection]:
+        """Least outstanding frames first."""
+        connected = [conn for conn in self.connections if conn.connected]
+        return min(connected, key=lambda conn: conn.in_flight) if connected else None
+
+    def _run_local(self, frame: np.ndarray, timestamp: float) -> Result:
+        if self.local_engine is None:
+            self.local_engine = self.local_engine_factory()
+        self.local_engine.collect_scores = self.collect_scores
+        self.local_engine.keep_landmarks = self.keep_landmarks
+        gesture, confidence = self.local_engine.process_frame(frame, timestamp)
+        self.stats['local'] += 1
+        return (gesture, confidence, self.local_engine.last_scores,
+                self.local_engine.last_landmarks, getattr(self.local_engine, 'last_handedness', None))
+
+    def _submit(self, frame: np.ndarray, timestamp: float) -> bool:
+        """Send a frame to the least loaded worker; False if none is reachable."""
+        conn = self._pick()
+        if conn is None:
+            return False
+        ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            return False
+
+        flags = (FLAG_SCORES if self.collect_scores else 0) | (FLAG_LANDMARKS if self.keep_landmarks else 0)
+        with self._cond:
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            entry = _Pending(self._seq, frame, timestamp, conn)
+            self._pending.append(entry)
+            self._by_seq[entry.seq] = entry
+            conn.in_flight += 1
+        # On failure the frame stays queued and _wait() recognizes it locally
+        conn.send(entry.seq, FRAME_PREFIX.pack(timestamp, flags) + jpeg.tobytes())
+        return True
+
+    def _wait(self, entry: _Pending) -> Result:
+        """Block until the result of entry arrives, or recognize it locally."""
+        deadline = entry.sent_at + self.timeout
+        with self._cond:
+            while entry.result is None and entry.conn.alive(entry.generation):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            result = entry.result
+            del self._by_seq[entry.seq]
+
+        if result is not None:
+            self.stats['remote'] += 1
+            return result
+        if entry.conn.alive(entry.generation):
+            logger.warning(f"推理节点 {entry.conn.name} 响应超时 (>{self.timeout}s)，断开并改用本地推理")
+            self.stats['timeouts'] += 1
+            entry.conn.close()
+        return self._run_local(entry.frame, entry.timestamp)
+
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Submit a frame and return the oldest result that is due.
+
+        Returns:
+            Tuple of (gesture_name, confidence), same contract as
+            GestureEngine.process_frame, for the frame submitted
+            max_in_flight calls earlier ((None, 0.0) while the pipeline fills).
+            That frame is left in self.last_frame (None while filling).
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        if self._submit(frame, timestamp):
+            if len(self._pending) > self.max_in_flight:
+                entry = self._pending.popleft()
+                result, self.last_frame = self._wait(entry), entry.frame
+            else:
+                result, self.last_frame = NO_HAND, None
+        else:
+            # No worker reachable: frames still queued are stale, recognize this one locally
+            with self._cond:
+                self._pending.clear()
+                self._by_seq.clear()
+            result, self.last_frame = self._run_local(frame, timestamp), frame
+
+        gesture, confidence, self.last_scores, self.last_landmarks, self.last_handedness = result
+        return gesture, confidence
+
+    def release(self):
+        """Close worker connections and the local fallback engine."""
+        self._stop.set()
+        for conn in self.connections:
+            conn.close()
+        if self.local_engine is not None:
+            self.local_engine.release()
+        logger.info(
+            f"远程推理统计: 远程 {self.stats['remote']} 帧, 本地 {self.stats['local']} 帧, "
+            f"超时 {self.stats['timeouts']} 次"
+        )
@@ -0,0 +1,170 @@
+import os
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the embedding layout changes; older indexes are refused
+INDEX_VERSION = 1
+EMBEDDING_DIM = 60  # 20 landmarks (wrist is the origin) x (x, y, z)
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+
+def normalize_landmarks(landmarks: np.ndarray, aspect: float = 1.0, mirror: bool = False) -> np.ndarray:
+    """
+    Turn hand landmarks into translation, scale and rotation invariant
+    embeddings.
+
+    The wrist is moved to the origin, the wrist -> middle finger MCP vector
+    is rotated to point straight up and scaled to unit length. x is first
+    multiplied by the frame aspect ratio because MediaPipe normalizes x and y
+    by different image dimensions.
+
+    Args:
+        landmarks: (21, 3) or (N, 21, 3) normalized landmarks
+        aspect: Frame width / height the landmarks were measured on
+        mirror: Flip x (e.g. for left hands) so one template serves both hands
+
+    Returns:
+        (60,) or (N, 60) float32 embeddings
+    """
+    points = np.asarray(landmarks, dtype=np.float64)
+    single = points.ndim == 2
+    if single:
+        points = points[None]
+    points = points.copy()
+
+    points[..., 0] *= aspect
+    if mirror:
+        points[..., 0] = -points[..., 0]
+
+    points -= points[:, WRIST:WRIST + 1, :]
+    axis = points[:, MIDDLE_MCP, :2]
+    scale = np.linalg.norm(axis, axis=1)
+    scale[scale < 1e-9] = 1e-9
+
+    # Rotate so the wrist -> middle MCP axis points to -y (up in image coordinates)
+    angle = -np.pi / 2 - np.arctan2(axis[:, 1], axis[:, 0])
+    cos, sin = np.cos(angle), np.sin(angle)
+    x = points[..., 0] * cos[:, None] - points[..., 1] * sin[:, None]
+    y = points[..., 0] * sin[:, None] + points[..., 1] * cos[:, None]
+    points[..., 0] = x
+    points[..., 1] = y
+    points /= scale[:, None, None]
+
+    embeddings = points[:, 1:, :].reshape(len(points), -1).astype(np.float32)
+    return embeddings[0] if single else embeddings
+
+
+class TemplateIndex:
+    """
+    Versioned on-disk store of labelled landmark embeddings (numpy .npz).
+    """
+
+    def __init__(self, path: str = config.TEMPLATE_INDEX_PATH):
+        self.path = path
+        self.embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.labels = np.zeros((0,), dtype='<U32')
+
+    def load(self) -> bool:
+        """Load the index; returns False if missing or incompatible."""
+        if not os.path.exists(self.path):
+            return False
+        with np.load(self.path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != INDEX_VERSION:
+                logger.error(f"手势模板索引版本不兼容: {version} (需要 {INDEX_VERSION})，请重新录制")
+                return False
+            self.embeddings = data['embeddings'].astype(np.float32)
+            self.labels = data['labels']
+        return True
+
+    def save(self):
+        """Write atomically so a running add-on never reads a partial file."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            version=np.int32(INDEX_VERSION),
+            embeddings=self.embeddings,
+            labels=self.labels,
+            updated=np.float64(time.time())
+        )
+        os.replace(tmp_path, self.path)
+
+    def add(self, label: str, embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        self.embeddings = np.concatenate([self.embeddings, embeddings])
+        self.labels = np.concatenate([self.labels, np.full(len(embeddings), label, dtype='<U32')])
+
+    def remove(self, label: str) -> int:
+        keep = self.labels != label
+        removed = int((~keep).sum())
+        self.embeddings = self.embeddings[keep]
+        self.labels = self.labels[keep]
+        return removed
+
+    def counts(self) -> Dict[str, int]:
+        names, counts = np.unique(self.labels, return_counts=True)
+        return dict(zip(names.tolist(), counts.tolist()))
+
+
+class TemplateClassifier:
+    """
+    Nearest-neighbour classifier over user-recorded gesture templates.
+
+    Distances to every template are computed with one matrix-vector product
+    (||e||^2 - 2 e.q + ||q||^2, template norms precomputed), which stays in
+    the microsecond range for hundreds of templates. A match is accepted
+    only if the RMS landmark distance is below the threshold.
+    """
+
+    def __init__(self, index: TemplateIndex, threshold: float = config.TEMPLATE_DISTANCE_THRESHOLD):
+        self.threshold = threshold
+        self.embeddings = index.embeddings
+        self.labels = index.labels
+        self.label_set = set(self.labels.tolist())
+        self._norms = np.einsum('ij,ij->i', self.embeddings, self.embeddings)
+        self._points = EMBEDDING_DIM // 3
+
+    @classmethod
+    def load(cls, path: str = config.TEMPLATE_INDEX_PATH) -> Optional['TemplateClassifier']:
+        """Return a classifier for the index at path, or None if there is none."""
+        index = TemplateIndex(path)
+        try:
+            if not index.load() or len(index.labels) == 0:
+                return None
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"加载手势模板索引失败: {e}")
+            return None
+        classifier = cls(index)
+        logger.info(f"自定义手势模板已加载: {index.counts()} (距离阈值 {classifier.threshold})")
+        return classifier
+
+    def classify(self, embedding: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            (label, distance) of the nearest template, label None if no
+            template is within the threshold
+        """
+        squared = self._norms - 2.0 * (self.embeddings @ embedding) + float(embedding @ embedding)
+        nearest = int(np.argmin(squared))
+        distance = float(np.sqrt(max(squared[nearest], 0.0) / self._points))
+        if distance > self.threshold:
+            return None, distance
+        return str(self.labels[nearest]), distance
+
+    def confidence(self, distance: float) -> float:
+        """Map a distance within the threshold to a 0.5-1.0 confidence."""
+        return 1.0 - 0.5 * min(distance / self.threshold, 1.0)
+
+    @property
+    def gesture_names(self) -> List[str]:
+        return sorted(self.label_set)
@@ -0,0 +1,210 @@
+import os
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import config
+import logging
+from src.gesture_engine import GestureEngine
+
+logger = logging.getLogger(__name__)
+
+# (x0, y0, x1, y1) in pixels
+Tile = Tuple[int, int, int, int]
+
+
+def parse_grid(grid: str) -> Tuple[int, int]:
+    """Parse a 'COLSxROWS' string such as '3x2'."""
+    try:
+        cols, rows = (int(v) for v in grid.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"无效的分块布局: {grid} (格式: 列x行, 例如 3x2)")
+    if cols < 1 or rows < 1:
+        raise ValueError(f"无效的分块布局: {grid}")
+    return cols, rows
+
+
+def compute_tiles(width: int, height: int, cols: int, rows: int, overlap: float) -> List[Tile]:
+    """
+    Split a frame into a cols x rows grid of tiles, each grown by `overlap`
+    (fraction of the base tile size) so a hand on a seam is fully inside at
+    least one tile.
+    """
+    step_x = width / cols
+    step_y = height / rows
+    pad_x = step_x * overlap / 2
+    pad_y = step_y * overlap / 2
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            x0 = int(max(0, col * step_x - pad_x))
+            y0 = int(max(0, row * step_y - pad_y))
+            x1 = int(min(width, (col + 1) * step_x + pad_x))
+            y1 = int(min(height, (row + 1) * step_y + pad_y))
+            tiles.append((x0, y0, x1, y1))
+    return tiles
+
+
+def _bbox(landmarks: np.ndarray) -> np.ndarray:
+    """(x0, y0, x1, y1) of a (21, 3) landmark array."""
+    return np.concatenate([landmarks[:, :2].min(axis=0), landmarks[:, :2].max(axis=0)])
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class TiledGestureEngine:
+    """
+    Runs one GestureEngine per tile of a high-resolution frame concurrently.
+
+    MediaPipe releases the GIL while running inference, so tiles recognized
+    on a thread pool execute in parallel. Each tile keeps its own engine (and
+    landmark filter state); hands found twice in overlapping regions are
+    merged by bounding-box overlap in full-frame coordinates.
+
+    Exposes the same process_frame / last_scores / release interface as
+    GestureEngine so main() can use either.
+    """
+
+    def __init__(
+        self,
+        grid: str = config.TILE_GRID,
+        overlap: float = config.TILE_OVERLAP,
+        max_tile_size: int = config.TILE_MAX_SIZE,
+        workers: int = config.TILE_WORKERS,
+        dedup_iou: float = 0.3
+    ):
+        self.cols, self.rows = parse_grid(grid)
+        self.overlap = overlap
+        self.max_tile_size = max_tile_size
+        self.dedup_iou = dedup_iou
+
+        num_tiles = self.cols * self.rows
+        if workers <= 0:
+            workers = min(num_tiles, os.cpu_count() or 1)
+
+        self.engines: List[GestureEngine] = []
+        for _ in range(num_tiles):
+            engine = GestureEngine()
+            engine.keep_landmarks = True
+            self.engines.append(engine)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tile')
+
+        self._tiles: List[Tile] = []
+        self._frame_size: Tuple[int, int] = (0, 0)
+
+        self.last_scores: Optional[Dict[str, float]] = None
+        self.last_landmarks: Optional[np.ndarray] = None  # full-frame normalized
+        self.last_frame: Optional[np.ndarray] = None
+        self.last_hands: List[Dict] = []
+
+        logger.info(
+            f"分块推理已启用: {self.cols}x{self.rows} 块, 重叠 {overlap:.0%}, "
+            f"线程池 {workers}, 单块最大边长 {max_tile_size}px"
+        )
+
+    def _layout(self, width: int, height: int) -> List[Tile]:
+        if self._frame_size != (width, height):
+            self._tiles = compute_tiles(width, height, self.cols, self.rows, self.overlap)
+            self._frame_size = (width, height)
+            logger.info(f"分块布局 ({width}x{height}): {self._tiles}")
+        return self._tiles
+
+    def _run_tile(self, index: int, frame: np.ndarray, tile: Tile, timestamp: Optional[float]) -> Optional[Dict]:
+        x0, y0, x1, y1 = tile
+        crop = frame[y0:y1, x0:x1]
+        tile_w, tile_h = x1 - x0, y1 - y0
+
+        longest = max(tile_w, tile_h)
+        if self.max_tile_size and longest > self.max_tile_size:
+            scale = self.max_tile_size / longest
+            crop = cv2.resize(crop, (max(1, int(tile_w * scale)), max(1, int(tile_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+
+        engine = self.engines[index]
+        gesture, confidence = engine.process_frame(crop, timestamp)
+        if gesture is None:
+            return None
+
+        # Tile-normalized landmarks -> full-frame-normalized landmarks
+        frame_h, frame_w = frame.shape[:2]
+        bbox = landmarks = None
+        if engine.last_landmarks is not None:
+            landmarks = engine.last_landmarks.copy()
+            landmarks[:, 0] = (x0 + landmarks[:, 0] * tile_w) / frame_w
+            landmarks[:, 1] = (y0 + landmarks[:, 1] * tile_h) / frame_h
+            bbox = _bbox(landmarks)
+
+        return {
+            'tile': index,
+            'gesture': gesture,
+            'confidence': confidence,
+            'scores': engine.last_scores,
+            'landmarks': landmarks,
+            'bbox': bbox,
+        }
+
+    def _dedupe(self, hands: List[Dict]) -> List[Dict]:
+        """Keep the most confident detection among hands overlapping across tiles."""
+        hands = sorted(hands, key=lambda h: (h['gesture'] != 'NONE', h['confidence']), reverse=True)
+        kept: List[Dict] = []
+        for hand in hands:
+            duplicate = hand['bbox'] is not None and any(
+                other['bbox'] is not None and _iou(hand['bbox'], other['bbox']) >= self.dedup_iou
+                for other in kept
+            )
+            if not duplicate:
+                kept.append(hand)
+        return kept
+
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Recognize gestures on all tiles of a full-resolution frame.
+
+        Returns:
+            Tuple of (gesture_name, confidence) for the best hand in the frame,
+            same contract as GestureEngine.process_frame
+        """
+        self.last_scores = None
+        self.last_landmarks = None
+        self.last_frame = frame
+        height, width = frame.shape[:2]
+        tiles = self._layout(width, height)
+
+        futures = [
+            self.executor.submit(self._run_tile, index, frame, tile, timestamp)
+            for index, tile in enumerate(tiles)
+        ]
+        hands = []
+        for future in futures:
+            try:
+                hand = future.result()
+            except Exception as e:
+                logger.error(f"分块推理出错: {e}")
+                continue
+            if hand is not None:
+                hands.append(hand)
+
+        self.last_hands = self._dedupe(hands)
+        if not self.last_hands:
+            return None, 0.0
+
+        # Best hand first: recognized gestures before 'NONE', then by confidence
+        best = self.last_hands[0]
+        self.last_scores = best['scores']
+        self.last_landmarks = best['landmarks']
+        if len(self.last_hands) > 1:
+            logger.debug(f"分块检测到 {len(self.last_hands)} 只手 (合并前 {len(hands)})")
+        return best['gesture'], best['confidence']
+
+    def release(self):
+        """Clean up resources."""
+        self.executor.shutdown(wait=True)
+        for engine in self.engines:
+            engine.release()
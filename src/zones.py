@@ -0,0 +1,211 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import config
+import logging
+from src.gesture_engine import GestureEngine
+
+logger = logging.getLogger(__name__)
+
+
+def parse_zones(definitions: List[Dict]) -> List[Dict]:
+    """
+    Validate activation zone definitions.
+
+    Each definition is {"name": str, "points": ..., "entity": bool} with
+    points in normalized frame coordinates (0-1), either as a string
+    "x,y x,y ..." or a list of [x, y] pairs. Two points describe a rectangle
+    (opposite corners), three or more a polygon.
+    """
+    zones = []
+    names = set()
+    for definition in definitions:
+        name = str(definition.get('name', '')).strip()
+        points = definition.get('points', [])
+        if isinstance(points, str):
+            points = [pair.split(',') for pair in points.split()]
+        try:
+            points = np.array(points, dtype=np.float64).reshape(-1, 2)
+        except ValueError:
+            raise ValueError(f"激活区域 {name} 坐标格式无效: {definition.get('points')!r}")
+
+        if not name or name in names:
+            raise ValueError(f"激活区域名称无效或重复: {name!r}")
+        if len(points) < 2 or points.min() < 0.0 or points.max() > 1.0:
+            raise ValueError(f"激活区域 {name} 需要至少 2 个 0-1 之间的坐标点")
+
+        if len(points) == 2:
+            (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+            points = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+
+        names.add(name)
+        zones.append({
+            'name': name,
+            'polygon': points,
+            'bbox': np.concatenate([points.min(axis=0), points.max(axis=0)]),
+            'entity': bool(definition.get('entity', False)),
+        })
+    return zones
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Vectorized even-odd ray casting.
+
+    Args:
+        points: (N, 2) points
+        polygon: (M, 2) polygon vertices
+
+    Returns:
+        (N,) boolean array, True where the point is inside
+    """
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+
+    crosses = (y0 <= y) != (y1 <= y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at_y = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return np.count_nonzero(crosses & (x < x_at_y), axis=1) % 2 == 1
+
+
+class ZonedGestureEngine:
+    """
+    Restricts recognition to configured activation zones.
+
+    The bounding crop of all zones together is recognized in one call per
+    frame, taken from the full-resolution frame and downscaled to at most the
+    normal FRAME_WIDTH x FRAME_HEIGHT pixel budget, so the frame outside the
+    zones is never processed. Each detected hand is assigned to the zones
+    whose polygon contains most of its landmarks; hands outside every zone
+    (TV screens, posters, walkways) are discarded.
+
+    Cost is one recognizer call per frame whatever the number of zones, plus
+    the landmark model once per detected hand. MediaPipe scales every input
+    to its fixed model size, so zones spread far apart (a crop close to the
+    whole frame) cost the same as whole-frame inference and give small zones
+    no extra detail.
+
+    Exposes the same process_frame / last_scores / release interface as
+    GestureEngine; per-zone results are left in last_zone_results. Zones
+    marked as entities publish to their own sensor and are left out of the
+    main result, so a gesture there does not also fire the main sensor.
+    """
+
+    def __init__(self, definitions: List[Dict], min_inside: float = 0.5):
+        self.zones = parse_zones(definitions)
+        self.min_inside = min_inside
+        self.max_size = max(config.FRAME_WIDTH, config.FRAME_HEIGHT)
+
+        boxes = np.array([zone['bbox'] for zone in self.zones])
+        self.bbox = np.concatenate([boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)])
+
+        # One recognizer for all zones, with room for a hand in every zone
+        self.engine = GestureEngine(num_hands=config.MAX_NUM_HANDS * len(self.zones))
+        self.engine.keep_landmarks = True
+        self.engine.keep_all_hands = True
+        self.engine.hand_key = self._hand_key
+
+        # (x0, y0, crop_w, crop_h, frame_w, frame_h) of the current crop
+        self._crop: Tuple[int, int, int, int, int, int] = (0, 0, 1, 1, 1, 1)
+
+        self.last_scores: Optional[Dict[str, float]] = None
+        self.last_landmarks: Optional[np.ndarray] = None  # full-frame normalized
+        self.last_frame: Optional[np.ndarray] = None
+        self.last_zone: Optional[str] = None
+        # zone -> (gesture, confidence, scores)
+        self.last_zone_results: Dict[str, Tuple[Optional[str], float, Optional[Dict[str, float]]]] = {}
+
+        logger.info(
+            f"激活区域已启用: {', '.join(z['name'] + (' (独立实体)' if z['entity'] else '') for z in self.zones)}"
+        )
+
+    @property
+    def entity_zones(self) -> List[str]:
+        return [zone['name'] for zone in self.zones if zone['entity']]
+
+    def _crop_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Cut the zones' bounding crop out of the frame, within the pixel budget."""
+        frame_h, frame_w = frame.shape[:2]
+        bx0, by0, bx1, by1 = self.bbox
+        x0, y0 = int(bx0 * frame_w), int(by0 * frame_h)
+        x1, y1 = max(x0 + 1, int(round(bx1 * frame_w))), max(y0 + 1, int(round(by1 * frame_h)))
+        crop = frame[y0:y1, x0:x1]
+        crop_w, crop_h = x1 - x0, y1 - y0
+        self._crop = (x0, y0, crop_w, crop_h, frame_w, frame_h)
+
+        longest = max(crop_w, crop_h)
+        if self.max_size and longest > self.max_size:
+            scale = self.max_size / longest
+            crop = cv2.resize(crop, (max(1, int(crop_w * scale)), max(1, int(crop_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        return crop
+
+    def _to_frame(self, landmarks: np.ndarray) -> np.ndarray:
+        """Crop-normalized landmarks -> frame-normalized landmarks."""
+        x0, y0, crop_w, crop_h, frame_w, frame_h = self._crop
+        landmarks = landmarks.copy()
+        landmarks[:, 0] = (x0 + landmarks[:, 0] * crop_w) / frame_w
+        landmarks[:, 1] = (y0 + landmarks[:, 1] * crop_h) / frame_h
+        return landmarks
+
+    def _coverage(self, landmarks: np.ndarray) -> np.ndarray:
+        """Fraction of the hand's frame-normalized landmarks inside each zone."""
+        return np.array([points_in_polygon(landmarks[:, :2], zone['polygon']).mean() for zone in self.zones])
+
+    def _hand_key(self, landmarks: np.ndarray, handedness: str) -> str:
+        """Smoothing key: hands in different zones never share filter state."""
+        zone = self.zones[int(self._coverage(self._to_frame(landmarks)).argmax())]
+        return f"{zone['name']}:{handedness}"
+
+    def process_frame(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Recognize gestures inside all activation zones.
+
+        Returns:
+            Tuple of (gesture_name, confidence) for the best hand over all
+            zones that are not entities, same contract as
+            GestureEngine.process_frame
+        """
+        self.last_scores = None
+        self.last_landmarks = None
+        self.last_frame = frame
+        self.last_zone = None
+        best: Tuple[Optional[str], float] = (None, 0.0)
+        best_rank = (False, False, 0.0)
+
+        self.engine.process_frame(self._crop_frame(frame), timestamp)
+
+        # Best hand of every zone: recognized gestures before 'NONE', then by confidence
+        zone_hands: List[Optional[Dict]] = [None] * len(self.zones)
+        for hand in self.engine.last_hands:
+            if hand['landmarks'] is None:
+                continue
+            landmarks = self._to_frame(hand['landmarks'])
+            coverage = self._coverage(landmarks)
+            if coverage.max() < self.min_inside:
+                logger.debug(f"手部不在任何激活区域内 (最多 {coverage.max():.0%} 关键点在区域内)，忽略")
+                continue
+            rank = (True, hand['gesture'] != 'NONE', hand['confidence'])
+            for index in np.flatnonzero(coverage >= self.min_inside):
+                current = zone_hands[index]
+                if current is None or rank > current['rank']:
+                    zone_hands[index] = dict(hand, landmarks=landmarks, rank=rank)
+
+        for zone, hand in zip(self.zones, zone_hands):
+            if hand is None:
+                self.last_zone_results[zone['name']] = (None, 0.0, None)
+                continue
+            self.last_zone_results[zone['name']] = (hand['gesture'], hand['confidence'], hand['scores'])
+            if not zone['entity'] and hand['rank'] > best_rank:
+                best, best_rank = (hand['gesture'], hand['confidence']), hand['rank']
+                self.last_zone = zone['name']
+                self.last_scores = hand['scores']
+                self.last_landmarks = hand['landmarks']
+
+        return best
+
+    def release(self):
+        """Clean up resources."""
+        self.engine.release()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Teach mode: record landmark templates for a user-defined gesture.
+
+Samples are taken from the live RTSP stream (default) or from a video file,
+normalized for translation, scale and rotation, and appended to the template
+index. Restart the add-on afterwards to load the new templates.
+
+Usage:
+    python3 teach.py PINCH                      # live stream, show the gesture to the camera
+    python3 teach.py PINCH --video pinch.mp4    # from a recorded clip
+    python3 teach.py --list
+    python3 teach.py --remove PINCH
+"""
+import argparse
+import re
+import sys
+import time
+from collections import Counter
+
+# CRITICAL: Suppress FFmpeg logs BEFORE importing cv2
+import suppress_ffmpeg_logs
+
+import numpy as np
+import logging
+
+import config
+import main as app
+from src.clip_reader import read_clip
+from src.gesture_engine import GestureEngine
+from src.template_classifier import TemplateIndex, normalize_landmarks
+
+logger = logging.getLogger('teach')
+
+NAME_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]{0,31}$')
+
+
+def frames_from_stream(rtsp_url: str):
+    """Yield (wall_time, frame) from the live stream until interrupted."""
+    stream = app.VideoStreamProcessor(rtsp_url)
+    if not stream.connect():
+        raise RuntimeError("无法连接到 RTSP 流")
+    try:
+        while True:
+            frame = stream.read_frame()
+            if frame is None:
+                time.sleep(0.05)
+                continue
+            yield time.time(), frame
+    finally:
+        stream.release()
+
+
+def record(args) -> int:
+    name = args.name.upper()
+    if not NAME_PATTERN.match(name):
+        logger.error(f"手势名称无效: {args.name} (仅限大写字母、数字和下划线)")
+        return 2
+    if name == 'NONE' or name in config.ENABLED_GESTURES:
+        logger.error(f"{name} 是内置手势，请使用其他名称")
+        return 2
+
+    engine = GestureEngine()
+    engine.keep_landmarks = True
+    engine.template_classifier = None  # record raw samples, not matches
+
+    frames = read_clip(args.video) if args.video else frames_from_stream(args.rtsp)
+    samples = []
+    builtin = Counter()
+    last_sample = None
+    if not args.video:
+        logger.info(f"请对着摄像头做出手势 {name}，缓慢变换角度和距离...")
+
+    try:
+        for timestamp, frame in frames:
+            gesture, _ = engine.process_frame(frame, timestamp)
+            if gesture is None or engine.last_landmarks is None:
+                continue
+            if last_sample is not None and timestamp - last_sample < args.interval:
+                continue
+
+            height, width = frame.shape[:2]
+            samples.append(normalize_landmarks(
+                engine.last_landmarks,
+                aspect=width / height,
+                mirror=engine.last_handedness == 'Left'
+            ))
+            builtin[gesture] += 1
+            last_sample = timestamp
+            logger.info(f"已采集样本 {len(samples)}/{args.samples}")
+            if len(samples) >= args.samples:
+                break
+    except KeyboardInterrupt:
+        logger.info("采集已中断")
+    finally:
+        engine.release()
+
+    if not samples:
+        logger.error("未采集到任何手部样本")
+        return 1
+
+    # Built-in gestures win over templates at runtime, so warn about overlap
+    recognized, count = max(((g, c) for g, c in builtin.items() if g != 'NONE'),
+                            key=lambda item: item[1], default=(None, 0))
+    if count > len(samples) // 2:
+        logger.warning(f"{count}/{len(samples)} 个样本被识别为内置手势 {recognized}，该模板可能很少生效")
+
+    index = TemplateIndex(args.index)
+    index.load()
+    index.add(name, np.stack(samples))
+    index.save()
+    logger.info(f"✓ 已保存 {len(samples)} 个 {name} 样本到 {args.index} (当前: {index.counts()})")
+    logger.info("重启加载项以启用新模板")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Record landmark templates for a custom gesture')
+    parser.add_argument('name', nargs='?', help='Gesture name, e.g. PINCH')
+    parser.add_argument('--video', default=None, help='Record from a video file instead of the live stream')
+    parser.add_argument('--rtsp', default=config.RTSP_URL, help='RTSP URL for live recording')
+    parser.add_argument('--samples', type=int, default=50, help='Number of samples to record')
+    parser.add_argument('--interval', type=float, default=0.1,
+                        help='Minimum seconds between samples, for varied poses')
+    parser.add_argument('--index', default=config.TEMPLATE_INDEX_PATH, help='Template index path')
+    parser.add_argument('--list', action='store_true', help='Show recorded gestures and exit')
+    parser.add_argument('--remove', metavar='NAME', default=None, help='Delete all samples of a gesture')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    index = TemplateIndex(args.index)
+
+    if args.list:
+        index.load()
+        counts = index.counts()
+        print('\n'.join(f"{name}: {count}" for name, count in counts.items()) if counts else "无已录制手势")
+        return 0
+
+    if args.remove:
+        if not index.load():
+            logger.error(f"模板索引不存在: {args.index}")
+            return 1
+        removed = index.remove(args.remove.upper())
+        index.save()
+        logger.info(f"已删除 {removed} 个 {args.remove.upper()} 样本")
+        return 0
+
+    if not args.name:
+        build_parser().error('gesture name required')
+    return record(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
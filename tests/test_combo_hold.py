@@ -0,0 +1,68 @@
+"""Repeat combos such as THUMBS_UP>THUMBS_UP: holds must not complete them, quick repeats must."""
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+pytest.importorskip('paho.mqtt.client')
+
+import main as app
+from src.combo_matcher import ComboMatcher
+
+FPS = 15
+COMBOS = [{'name': 'double_up', 'sequence': 'THUMBS_UP>THUMBS_UP', 'timeout': 2.0}]
+
+
+def run(frames, monkeypatch):
+    """Feed (gesture or None) per frame through GestureBuffer and the combo matcher."""
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(app.time, 'time', lambda: clock['now'])
+    buffer = app.GestureBuffer(min_detections=2, cooldown=1.5, confidence_threshold=0.5)
+    buffer.release_skips_cooldown = True  # as main() does when combos are configured
+    matcher = ComboMatcher(COMBOS)
+
+    events = []
+    for gesture in frames:
+        triggered = buffer.add_detection(gesture, 0.9 if gesture else 0.0)
+        events += app.route_trigger(matcher, buffer, triggered, 0.9, clock['now'])
+        clock['now'] += 1.0 / FPS
+    # Let pending sequences time out
+    clock['now'] += 3.0
+    events += app.route_trigger(matcher, buffer, None, 0.0, clock['now'])
+    return events
+
+
+def test_continuous_hold_is_not_a_combo(monkeypatch):
+    hold = ['THUMBS_UP'] * int(1.7 * FPS)
+    events = run(hold, monkeypatch)
+
+    assert ('combo', 'double_up', 0.9) not in events
+    assert events == [('gesture', 'THUMBS_UP', 0.9), ('gesture', 'THUMBS_UP', 0.9)]
+
+
+def test_release_between_gestures_is_a_combo(monkeypatch):
+    # Second thumbs-up after a release, once the 1.5 s cooldown has passed
+    frames = ['THUMBS_UP'] * 5 + [None] * 20 + ['THUMBS_UP'] * 5
+    events = run(frames, monkeypatch)
+
+    assert events == [('combo', 'double_up', 0.9)]
+
+
+def test_quick_release_within_cooldown_is_a_combo(monkeypatch):
+    # A normal double thumbs-up, second one about 0.8 s after the first
+    frames = ['THUMBS_UP'] * 4 + [None] * 8 + ['THUMBS_UP'] * 4
+    events = run(frames, monkeypatch)
+
+    assert events == [('combo', 'double_up', 0.9)]
+
+
+def test_cooldown_still_applies_without_combos(monkeypatch):
+    clock = {'now': 1000.0}
+    monkeypatch.setattr(app.time, 'time', lambda: clock['now'])
+    buffer = app.GestureBuffer(min_detections=2, cooldown=1.5, confidence_threshold=0.5)
+
+    triggered = []
+    for gesture in ['THUMBS_UP'] * 4 + [None] * 8 + ['THUMBS_UP'] * 4:
+        triggered.append(buffer.add_detection(gesture, 0.9 if gesture else 0.0))
+        clock['now'] += 1.0 / FPS
+
+    assert [g for g in triggered if g] == ['THUMBS_UP']